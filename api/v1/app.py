@@ -2,7 +2,7 @@
 """ app.py
 Module that starts a Flask API
 """
-from flask import Flask, jsonify, Blueprint
+from flask import Flask, jsonify, Blueprint, request
 from flask_cors import CORS
 from models import storage
 from api.v1.views import app_views
@@ -14,6 +14,13 @@ app.register_blueprint(app_views)
 app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
 
 
+@app.before_request
+def read_from_replicas():
+    """Sends the reads of GET requests to a database read replica"""
+    if request.method in ('GET', 'HEAD'):
+        storage.use_replicas()
+
+
 @app.teardown_appcontext
 def shutdown_session(response_or_exc):
     """Close the current SQLAlchemy Session"""
@@ -1,9 +1,72 @@
 #!/usr/bin/python3
 """ Module that implements a blueprint"""
-from flask import Blueprint
+from flask import Blueprint, Response, abort, request
+from flask import stream_with_context
+from models import storage
 
 app_views = Blueprint('app_views', __name__, url_prefix='/api/v1')
 
+
+def stream_objects(cls):
+    """Streams the JSON list of cls objects, paginated by the offset and
+    limit query parameters, without holding them all in memory; the after
+    query parameter is a keyset cursor, the id of the last object of the
+    previous page"""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', None, type=int)
+    if limit is not None:
+        limit = max(limit, 0)
+    objs = storage.iterate(cls, offset=offset, limit=limit,
+                           after=request.args.get('after'))
+
+    def generate():
+        """yields the JSON list one object at a time"""
+        # the storage was closed at the end of the request, before the
+        # response streams: its reads go through a new session
+        if request.method in ('GET', 'HEAD'):
+            storage.use_replicas()
+        yield b"["
+        for i, obj in enumerate(objs):
+            yield (b", " if i else b"") + obj.to_json(sort_keys=True)
+        yield b"]\n"
+    return Response(stream_with_context(generate()),
+                    mimetype='application/json')
+
+
+def json_objects(objs, status=200):
+    """Returns the JSON list of objs, each serialized straight to bytes by
+    its to_json()"""
+    return Response(b"[" + b", ".join(obj.to_json(sort_keys=True)
+                                      for obj in objs) + b"]\n",
+                    status=status, mimetype='application/json')
+
+
+def create_objects(cls, items, required):
+    """Creates the cls objects of a list of JSON dictionaries and saves
+    them all at once with storage.bulk_save()"""
+    for item in items:
+        if type(item) is not dict:
+            abort(400, {'Not a JSON'})
+        for key in required:
+            if key not in item:
+                abort(400, {'Missing ' + key})
+    objs = [cls(**item) for item in items]
+    storage.bulk_save(objs)
+    return json_objects(objs, 201)
+
+
+def update_object(obj, attributes, ignore):
+    """Sets the attributes of a JSON dictionary on obj, but for the keys of
+    ignore and the values it already has, and saves the storage only if
+    a field changed: only the fields that changed are written"""
+    missing = object()
+    for key, value in attributes.items():
+        if key not in ignore and getattr(obj, key, missing) != value:
+            setattr(obj, key, value)
+    if obj.changed_fields():
+        storage.save()
+    return obj
+
 from api.v1.views.index import *
 from api.v1.views.states import *
 from api.v1.views.amenities import *
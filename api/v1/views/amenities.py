@@ -4,7 +4,8 @@ New view for Amenity objects and handles default REstful API
 """
 
 from flask import Flask, jsonify, abort, request
-from api.v1.views import app_views
+from api.v1.views import app_views, create_objects, stream_objects
+from api.v1.views import update_object
 from models import storage
 from models.amenity import Amenity
 
@@ -12,10 +13,7 @@ from models.amenity import Amenity
 @app_views.route('/amenities', strict_slashes=False)
 def all_amenities():
     """ Retrieves list of all Amenity objects """
-    all_amenities = []
-    for amenity in storage.all(Amenity).values():
-        all_amenities.append(amenity.to_dict())
-    return jsonify(all_amenities)
+    return stream_objects(Amenity)
 
 
 @app_views.route('/amenities/<amenity_id>', strict_slashes=False)
@@ -42,8 +40,10 @@ def delete_amenity(amenity_id):
 @app_views.route('/amenities', methods=['POST'],
                  strict_slashes=False)
 def create_amenity():
-    """ Creates an Amenity """
+    """ Creates an Amenity, or each Amenity of a JSON list at once """
     amenity_name = request.get_json()
+    if type(amenity_name) is list:
+        return create_objects(Amenity, amenity_name, ['name'])
     if not amenity_name:
         abort(400, {'Not a JSON'})
     if 'name' not in amenity_name:
@@ -64,8 +64,6 @@ def update_amenity(amenity_id):
     my_amenity = storage.get(Amenity, amenity_id)
     if not my_amenity:
         abort(404)
-    for key, value in update_attr.items():
-        if key not in ['id', 'created_at', 'updated_at']:
-            setattr(my_amenity, key, value)
-    storage.save()
+    update_object(my_amenity, update_attr, ['id', 'created_at',
+                                            'updated_at'])
     return my_amenity.to_dict()
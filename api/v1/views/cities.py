@@ -3,7 +3,7 @@
 Module that creates a new view for 'City' objects that handles all default
 RestFul API actions: GET, DELETE, POST, PUT
 """
-from api.v1.views import app_views
+from api.v1.views import app_views, json_objects, update_object
 from models.state import State
 from models.city import City
 from models import storage
@@ -21,7 +21,7 @@ def get_cities(state_id=None, city_id=None):
     if city_id and city:
         return city.to_dict()
     elif state_id and state:
-        return jsonify([city.to_dict() for city in state.cities])
+        return json_objects(state.cities)
     else:
         abort(404)
 
@@ -66,8 +66,6 @@ def update_city(city_id=None):
     city = storage.get(City, city_id)
     if not city:
         abort(404)
-    for attr, value in city_attributes.items():
-        if attr not in ['created_at', 'updated_at', 'id', 'state_id']:
-            setattr(city, attr, value)
-    storage.save()
+    update_object(city, city_attributes, ['created_at', 'updated_at', 'id',
+                                          'state_id'])
     return jsonify(city.to_dict()), 200
@@ -1,7 +1,8 @@
 #!/usr/bin/python3
 """Module that set the routes and display API status and stats"""
-from flask import jsonify
+from flask import abort, jsonify
 from api.v1.views import app_views
+import models
 from models import storage
 from models.state import State
 from models.city import City
@@ -28,5 +29,32 @@ def count_hbnb_instances():
         'states': State,
         'users': User
     }
-    response = {k: storage.count(v) for k, v in hbnb_classes.items()}
+    counts = storage.counts(hbnb_classes.values())
+    response = {k: counts[v.__name__] for k, v in hbnb_classes.items()}
     return jsonify(response)
+
+
+@app_views.route('/stats/pool', strict_slashes=False, methods=["GET"])
+def pool_stats():
+    """Retrieves the live statistics of the database connection pool"""
+    if not hasattr(storage, 'pool_stats'):
+        abort(404)
+    return jsonify(storage.pool_stats())
+
+
+@app_views.route('/stats/cache', strict_slashes=False, methods=["GET"])
+def cache_stats():
+    """Retrieves the hits, misses and evictions of the storage cache"""
+    if not hasattr(storage, 'cache_stats'):
+        abort(404)
+    return jsonify(storage.cache_stats())
+
+
+@app_views.route('/stats/startup', strict_slashes=False, methods=["GET"])
+def startup_stats():
+    """Retrieves the seconds the storage took to start up"""
+    stats = {"storage": type(storage).__name__,
+             "seconds": models.startup_time}
+    if hasattr(storage, 'startup_stats'):
+        stats.update(storage.startup_stats())
+    return jsonify(stats)
@@ -3,7 +3,8 @@
 Module that creates a new view for 'Place' objects that handles all default
 RestFul API actions: GET, DELETE, POST, PUT
 """
-from api.v1.views import app_views
+from api.v1.views import app_views, json_objects, stream_objects
+from api.v1.views import update_object
 from models.state import State
 from models.city import City
 from models.place import Place
@@ -22,7 +23,7 @@ def get_places(city_id=None, place_id=None):
     city = storage.get(City, city_id)
     place = storage.get(Place, place_id)
     if city_id and city:
-        return jsonify([place.to_dict() for place in city.places])
+        return json_objects(city.places)
     elif place_id and place:
         return jsonify(place.to_dict()), 200
     else:
@@ -80,50 +81,49 @@ def search_places():
             are empty, will search all hbnb 'Place' objects for a place
             having all 'Amenity' IDs listed"""
     search_parms = request.get_json()
-    hbnb_places = storage.all(Place).values()  # All hbnb Place objects
     if search_parms is None:
         abort(400, {'Not a JSON'})
     if len(search_parms) == 0:
-        return jsonify([place.to_dict() for place in hbnb_places])
+        return stream_objects(Place)
 
     states = search_parms.get('states')
     cities = search_parms.get('cities')
     amenities = search_parms.get('amenities')
     if not states and not cities and not amenities:
-        return jsonify([place.to_dict() for place in hbnb_places])
+        return stream_objects(Place)
 
+    # relationships walked below, loaded with one query per level
+    place_paths = ['places.amenities'] if amenities else ['places']
     state_cities = []  #  Stores cities for each state ID
     all_state_places = []  #  Stores all places in a state ID
     if states:
-        for id in states:
-            state = storage.get(State, id)
-            if state:
-                state_cities.extend([city for city in state.cities])
+        state_paths = ['cities.' + path for path in place_paths]
+        for state in storage.get_many(State, states, prefetch=state_paths):
+            state_cities.extend([city for city in state.cities])
         for city in state_cities:
             for place in city.places:
                 all_state_places.append(place)
 
     all_city_places = []  #  Stores all places in all cities
     if cities:
-        for id in cities:
-            city = storage.get(City, id)
-            if city:
-                all_city_places.extend([place for place in city.places])
+        for city in storage.get_many(City, cities, prefetch=place_paths):
+            all_city_places.extend([place for place in city.places])
 
     searched_places = []
     if amenities:
         if cities or states:
             places_to_search = all_state_places + all_city_places
         elif not cities and not states:
-            places_to_search = hbnb_places
+            places_to_search = storage.all(
+                Place, prefetch=['amenities']).values()
         for place in places_to_search:
             amen_list = [item.id for item in place.amenities]
             if all(i in amen_list for i in amenities):
                 searched_places.append(place)
-        return jsonify([place.to_dict() for place in searched_places])
+        return json_objects(searched_places)
     else:
         all_places = all_state_places + all_city_places
-        return jsonify([place.to_dict() for place in all_places])
+        return json_objects(all_places)
 
 
 @app_views.route('/places/<place_id>', methods=['PUT'], strict_slashes=False)
@@ -135,9 +135,6 @@ def update_place(place_id=None):
     place = storage.get(Place, place_id)
     if not place:
         abort(404)
-    for attr, value in place_attributes.items():
-        ignore = ['created_at', 'updated_at', 'id', 'user_id', 'city_id']
-        if attr not in ignore:
-            setattr(place, attr, value)
-    storage.save()
+    ignore = ['created_at', 'updated_at', 'id', 'user_id', 'city_id']
+    update_object(place, place_attributes, ignore)
     return jsonify(place.to_dict()), 200
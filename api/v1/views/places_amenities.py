@@ -5,7 +5,7 @@ that handles all default RestFul API actions: GET, DELETE, POST, PUT
 """
 from os import getenv
 from models import storage
-from api.v1.views import app_views
+from api.v1.views import app_views, json_objects
 from models.place import Place
 from models.amenity import Amenity
 from flask import jsonify, abort, request
@@ -18,7 +18,7 @@ def get_amenities_by_place(place_id=None):
     GET /places/<place_id>/amenities"""
     place = storage.get(Place, place_id)
     if place and place_id:
-        return jsonify([amenity.to_dict() for amenity in place.amenities])
+        return json_objects(place.amenities)
     else:
         abort(404)
 
@@ -3,7 +3,7 @@
 New view for Review objects
 """
 from flask import Flask, jsonify, abort, request
-from api.v1.views import app_views
+from api.v1.views import app_views, json_objects, update_object
 from models import storage
 from models.review import Review
 from models.place import Place
@@ -18,7 +18,7 @@ def get_reviews(place_id=None, review_id=None):
     place = storage.get(Place, place_id)
     review = storage.get(Review, review_id)
     if place_id and place:
-        return jsonify([review.to_dict() for review in place.reviews])
+        return json_objects(place.reviews)
     elif review_id and review:
         return jsonify(review.to_dict()), 200
     else:
@@ -70,9 +70,6 @@ def update_review(review_id=None):
     review = storage.get(Review, review_id)
     if not review:
         abort(404)
-    for key, value in update_attr.items():
-        if key not in ['id', 'user_id', 'place_id', 'created_at',
-                       'updated_at']:
-            setattr(review, key, value)
-    storage.save()
+    update_object(review, update_attr, ['id', 'user_id', 'place_id',
+                                        'created_at', 'updated_at'])
     return jsonify(review.to_dict()), 200
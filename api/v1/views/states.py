@@ -3,7 +3,8 @@
 Module that creates a new view for 'State' objects that handles all default
 RestFul API actions: GET, DELETE, POST, PUT
 """
-from api.v1.views import app_views
+from api.v1.views import app_views, create_objects, stream_objects
+from api.v1.views import update_object
 from models.state import State
 from models import storage
 from flask import jsonify, abort, request
@@ -20,8 +21,7 @@ def get_states(state_id=None):
         else:
             abort(404)
     else:
-        all_states = storage.all(State).values()
-        return jsonify([state.to_dict() for state in all_states])
+        return stream_objects(State)
 
 
 @app_views.route('/states/<state_id>', methods=["DELETE"],
@@ -39,8 +39,11 @@ def delete_state(state_id):
 
 @app_views.route('/states', strict_slashes=False, methods=["POST"])
 def create_state():
-    """Creates a State: POST /api/v1/states"""
+    """Creates a State, or each State of a JSON list at once:
+    POST /api/v1/states"""
     request_json = request.get_json()
+    if type(request_json) is list:
+        return create_objects(State, request_json, ['name'])
     if not request_json:
         abort(400, {'Not a JSON'})
     elif 'name' not in request_json:
@@ -59,8 +62,6 @@ def update_state(state_id=None):
     state = storage.get(State, state_id)
     if not state:
         abort(404)
-    for attr, value in state_attributes.items():
-        if attr not in ['created_at', 'updated_at', 'id']:
-            setattr(state, attr, value)
-    storage.save()
+    update_object(state, state_attributes, ['created_at', 'updated_at',
+                                            'id'])
     return jsonify(state.to_dict()), 200
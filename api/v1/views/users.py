@@ -3,7 +3,8 @@
 New view for User objects that handles default Restful API actions
 """
 from flask import Flask, jsonify, abort, request
-from api.v1.views import app_views
+from api.v1.views import app_views, create_objects, stream_objects
+from api.v1.views import update_object
 from models import storage
 from models.user import User
 
@@ -11,10 +12,7 @@ from models.user import User
 @app_views.route('/users', strict_slashes=False, methods=["GET"])
 def all_users():
     """ Retrieves list of all User objects """
-    all_users = []
-    for user in storage.all(User).values():
-        all_users.append(user.to_dict())
-    return jsonify(all_users)
+    return stream_objects(User)
 
 
 @app_views.route('/users/<user_id>', strict_slashes=False, methods=["GET"])
@@ -42,8 +40,10 @@ def delete_user(user_id):
 @app_views.route('/users', methods=['POST'],
                  strict_slashes=False)
 def create_user():
-    """ Creates a User """
+    """ Creates a User, or each User of a JSON list at once """
     user_name = request.get_json()
+    if type(user_name) is list:
+        return create_objects(User, user_name, ['email', 'password'])
     if not user_name:
         abort(400, {'Not a JSON'})
     elif 'email' not in user_name:
@@ -66,8 +66,6 @@ def update_user(user_id):
     my_user = storage.get(User, user_id)
     if not my_user:
         abort(404)
-    for key, value in update_attr.items():
-        if key not in ['created_at', 'updated_at', 'id', 'email']:
-            setattr(my_user, key, value)
-    storage.save()
+    update_object(my_user, update_attr, ['created_at', 'updated_at', 'id',
+                                         'email'])
     return my_user.to_dict(), 200
@@ -0,0 +1,18 @@
+#!/usr/bin/python3
+"""
+benchmarks of the models and storage engines, run from the repository root
+with python3 -m benchmarks.<name>
+"""
+import time
+
+
+def rate(count, function, repeat=3):
+    """returns the best number of items per second of function, which
+    handles count items per call"""
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return count / best
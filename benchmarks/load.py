@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""
+Measures the load rate of file storage in objects per second: building the
+objects of stored dictionaries one constructor call at a time or with the
+loader of their class, and a full reload() and all() of a file.json
+
+Usage: python3 -m benchmarks.load [objects]
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks import rate
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # the storage file is file.json in the current directory
+    os.chdir(tempfile.mkdtemp())
+    from models.base_model import loader
+    from models.engine import file_storage
+    from models.review import Review
+
+    records = [Review(place_id="4d0e8d3b", user_id="aa26b9a0",
+                      text="Amazing place, huge kitchen").to_dict()
+               for i in range(count)]
+    with open("file.json", "w") as f:
+        json.dump({"Review." + record["id"]: record for record in records},
+                  f)
+
+    def reload_all():
+        """reloads file.json into a fresh storage and instantiates it; the
+        storage state is held by its class, so the module is reloaded for
+        an empty class, like in a new process"""
+        storage = importlib.reload(file_storage).FileStorage()
+        storage.reload()
+        storage.all()
+
+    print("{} reviews".format(count))
+    print("{:28}{:>10.0f} objects/s".format("Review(**record)", rate(
+        count, lambda: [Review(**record) for record in records])))
+    print("{:28}{:>10.0f} objects/s".format("loader(Review).load()", rate(
+        count, lambda: loader(Review).load([dict(record)
+                                            for record in records]))))
+    print("{:28}{:>10.0f} objects/s".format("reload() and all()", rate(
+        count, reload_all)))
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""
+Measures the bytes per object of each model, with the default models and
+with HBNB_COMPACT_MODELS=1, in file storage
+
+Usage: python3 -m benchmarks.memory [objects per class]
+"""
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+import uuid
+
+parent_id = str(uuid.uuid4())
+records = {
+    "Amenity": {"name": "Wifi"},
+    "City": {"state_id": parent_id, "name": "San Francisco"},
+    "Place": {"city_id": parent_id, "user_id": parent_id,
+              "name": "Lovely place", "description": "Faraway from Midtown",
+              "number_rooms": 3, "number_bathrooms": 1, "max_guest": 6,
+              "price_by_night": 120, "latitude": 37.773972,
+              "longitude": -122.431297},
+    "Review": {"place_id": parent_id, "user_id": parent_id,
+               "text": "Amazing place, huge kitchen"},
+    "State": {"name": "California"},
+    "User": {"email": "bob@hbtn.io", "password": "pwd",
+             "first_name": "Bob", "last_name": "Dylan"},
+}
+
+
+def measure(count):
+    """returns the bytes allocated per object for count objects of each
+    model loaded from their dictionary, like FileStorage.reload() does"""
+    from models.engine.file_storage import classes
+
+    sizes = {}
+    for cls_name, record in records.items():
+        dicts = [dict(record, id=str(uuid.uuid4()),
+                      created_at="2017-09-28T21:03:54.052298",
+                      updated_at="2017-09-28T21:03:54.052302",
+                      __class__=cls_name) for i in range(count)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        objs = [classes[cls_name](**value) for value in dicts]
+        sizes[cls_name] = (tracemalloc.get_traced_memory()[0] - before) / \
+            count
+        tracemalloc.stop()
+        del objs
+    return sizes
+
+
+def run(count, compact):
+    """returns measure(count) from a new process, with or without the
+    compact models"""
+    env = dict(os.environ, HBNB_COMPACT_MODELS="1" if compact else "0")
+    env.pop("HBNB_TYPE_STORAGE", None)
+    out = subprocess.run([sys.executable, "-m", "benchmarks.memory",
+                          "--measure", str(count)], env=env,
+                         stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(out)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--measure":
+        print(json.dumps(measure(int(sys.argv[2]))))
+        sys.exit(0)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    default = run(count, False)
+    compact = run(count, True)
+    print("bytes per object, {} objects per class".format(count))
+    print("{:10}{:>10}{:>10}{:>8}".format("class", "default", "compact",
+                                          "saved"))
+    for cls_name in records:
+        print("{:10}{:>10.0f}{:>10.0f}{:>7.0%}".format(
+            cls_name, default[cls_name], compact[cls_name],
+            1 - compact[cls_name] / default[cls_name]))
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Measures the throughput of the model serializer: objects serialized to JSON
+per second by to_json() and by the former to_dict() with json.dumps(), and
+requests per second of API list endpoints, in file storage
+
+Usage: python3 -m benchmarks.serializer [objects]
+"""
+import json
+import sys
+
+from benchmarks import rate
+
+
+def legacy_json(obj):
+    """returns the JSON of obj the way BaseModel.to_dict() and json.dumps()
+    made it before the serializer"""
+    new_dict = obj.__dict__.copy()
+    if "created_at" in new_dict:
+        new_dict["created_at"] = new_dict["created_at"].strftime(
+            "%Y-%m-%dT%H:%M:%S.%f")
+    if "updated_at" in new_dict:
+        new_dict["updated_at"] = new_dict["updated_at"].strftime(
+            "%Y-%m-%dT%H:%M:%S.%f")
+    new_dict["__class__"] = obj.__class__.__name__
+    if "_sa_instance_state" in new_dict:
+        del new_dict["_sa_instance_state"]
+    if obj.__class__.__name__ == 'Place':
+        new_dict.pop('amenities', None)
+    return json.dumps(new_dict, sort_keys=True).encode()
+
+
+if __name__ == "__main__":
+    from api.v1.app import app
+    from models import storage
+    from models.city import City
+    from models.place import Place
+    from models.state import State
+    from models.user import User
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    state = State(name="California")
+    city = City(state_id=state.id, name="San Francisco")
+    storage.new(state)
+    storage.new(city)
+    users = [User(email="bob@hbtn.io", password="pwd", first_name="Bob",
+                  last_name="Dylan") for i in range(count)]
+    places = [Place(city_id=city.id, user_id=users[i].id, name="Loft",
+                    description="Faraway from Midtown", number_rooms=3,
+                    price_by_night=120, latitude=37.77, longitude=-122.43)
+              for i in range(count)]
+    for obj in users + places:
+        storage.new(obj)
+
+    print("{} objects".format(count))
+    for name, function in [("json.dumps(to_dict())", legacy_json),
+                           ("to_json()",
+                            lambda obj: obj.to_json(sort_keys=True))]:
+        print("{:28}{:>10.0f} objects/s".format(name, rate(
+            2 * count, lambda: [function(obj) for obj in users + places])))
+    client = app.test_client()
+    print("{:28}{:>10.1f} requests/s".format("GET /api/v1/users", rate(
+        1, lambda: client.get("/api/v1/users").data)))
+    print("{:28}{:>10.1f} requests/s".format(
+        "POST /api/v1/places_search", rate(1, lambda: client.post(
+            "/api/v1/places_search", json={"cities": [city.id]}).data)))
@@ -3,6 +3,7 @@
 
 import cmd
 from datetime import datetime
+import json
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel
@@ -77,9 +78,9 @@ class HBNBCommand(cmd.Cmd):
             return False
         if args[0] in classes:
             if len(args) > 1:
-                key = args[0] + "." + args[1]
-                if key in models.storage.all():
-                    print(models.storage.all()[key])
+                obj = models.storage.get(classes[args[0]], args[1])
+                if obj is not None:
+                    print(obj)
                 else:
                     print("** no instance found **")
             else:
@@ -94,9 +95,9 @@ class HBNBCommand(cmd.Cmd):
             print("** class name missing **")
         elif args[0] in classes:
             if len(args) > 1:
-                key = args[0] + "." + args[1]
-                if key in models.storage.all():
-                    models.storage.all().pop(key)
+                obj = models.storage.get(classes[args[0]], args[1])
+                if obj is not None:
+                    models.storage.delete(obj)
                     models.storage.save()
                 else:
                     print("** no instance found **")
@@ -108,18 +109,16 @@ class HBNBCommand(cmd.Cmd):
     def do_all(self, arg):
         """Prints string representations of instances"""
         args = shlex.split(arg)
-        obj_list = []
         if len(args) == 0:
-            obj_dict = models.storage.all()
+            objs = models.storage.iterate()
         elif args[0] in classes:
-            obj_dict = models.storage.all(classes[args[0]])
+            objs = models.storage.iterate(classes[args[0]])
         else:
             print("** class doesn't exist **")
             return False
-        for key in obj_dict:
-            obj_list.append(str(obj_dict[key]))
         print("[", end="")
-        print(", ".join(obj_list), end="")
+        for i, obj in enumerate(objs):
+            print((", " if i else "") + str(obj), end="")
         print("]")
 
     def do_update(self, arg):
@@ -132,8 +131,8 @@ class HBNBCommand(cmd.Cmd):
             print("** class name missing **")
         elif args[0] in classes:
             if len(args) > 1:
-                k = args[0] + "." + args[1]
-                if k in models.storage.all():
+                obj = models.storage.get(classes[args[0]], args[1])
+                if obj is not None:
                     if len(args) > 2:
                         if len(args) > 3:
                             if args[0] == "Place":
@@ -147,8 +146,8 @@ class HBNBCommand(cmd.Cmd):
                                         args[3] = float(args[3])
                                     except:
                                         args[3] = 0.0
-                            setattr(models.storage.all()[k], args[2], args[3])
-                            models.storage.all()[k].save()
+                            setattr(obj, args[2], args[3])
+                            obj.save()
                         else:
                             print("** value missing **")
                     else:
@@ -160,5 +159,45 @@ class HBNBCommand(cmd.Cmd):
         else:
             print("** class doesn't exist **")
 
+    def do_import(self, arg):
+        """Creates the instances of a JSON file, saved all at once: either
+        a dictionary like file.json or a list of dictionaries, each with
+        its __class__"""
+        args = shlex.split(arg)
+        if len(args) == 0:
+            print("** file name missing **")
+            return False
+        try:
+            with open(args[0], 'r') as f:
+                objs = json.load(f)
+        except (OSError, ValueError):
+            print("** file can't be read **")
+            return False
+        if type(objs) is dict:
+            objs = list(objs.values())
+        for obj in objs:
+            if type(obj) is not dict or obj.get("__class__") not in classes:
+                print("** class doesn't exist **")
+                return False
+        objs = [classes[obj["__class__"]](**obj) for obj in objs]
+        try:
+            models.storage.bulk_save(objs)
+        except ValueError as error:
+            print("** {} **".format(error))
+            return False
+        print(len(objs))
+
+    def do_schema(self, arg):
+        """Prints the schema version of the database and the indexes of
+        the models it is missing"""
+        if not hasattr(models.storage, "missing_indexes"):
+            print("** storage is not a database **")
+            return False
+        print("schema version {}".format(models.storage.schema_version()))
+        for index in models.storage.missing_indexes():
+            print("missing index {} on {}({})".format(
+                index.name, index.table.name,
+                ", ".join(column.name for column in index.columns)))
+
 if __name__ == '__main__':
     HBNBCommand().cmdloop()
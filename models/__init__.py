@@ -4,14 +4,24 @@ initialize the models package
 """
 
 from os import getenv
+import time
 
 
 storage_t = getenv("HBNB_TYPE_STORAGE")
+started = time.perf_counter()
 
-if storage_t == "db":
+if storage_t == "sqlite":
+    # SQLite uses the same SQLAlchemy models as MySQL
+    storage_t = "db"
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage()
+elif storage_t == "db":
     from models.engine.db_storage import DBStorage
     storage = DBStorage()
 else:
+    # "binary" is file storage with a binary snapshot instead of file.json
     from models.engine.file_storage import FileStorage
     storage = FileStorage()
 storage.reload()
+# seconds spent importing and setting up the storage, at the first import
+startup_time = time.perf_counter() - started
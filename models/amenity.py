@@ -12,10 +12,6 @@ class Amenity(BaseModel, Base):
     """Representation of Amenity """
     if models.storage_t == 'db':
         __tablename__ = 'amenities'
-        name = Column(String(128), nullable=False)
+        name = Column(String(128), nullable=False, index=True)
     else:
         name = ""
-
-    def __init__(self, *args, **kwargs):
-        """initializes Amenity"""
-        super().__init__(*args, **kwargs)
@@ -4,11 +4,15 @@ Contains class BaseModel
 """
 import hashlib
 from datetime import datetime
+import json
 import models
 from os import getenv
+import secrets
 import sqlalchemy
 from sqlalchemy import Column, String, DateTime
 from sqlalchemy.ext.declarative import declarative_base
+import threading
+from time import time_ns
 import uuid
 
 time = "%Y-%m-%dT%H:%M:%S.%f"
@@ -18,13 +22,213 @@ if models.storage_t == "db":
 else:
     Base = object
 
+# HBNB_COMPACT_MODELS=1 keeps the attributes of file storage objects in
+# __slots__, without a __dict__ per instance
+compact = models.storage_t != "db" and getenv("HBNB_COMPACT_MODELS") == "1"
 
-class BaseModel:
+
+class Compact(type):
+    """metaclass of the compact models: the plain class attributes of a
+    model, its defaults, become __slots__ and move to _defaults, and
+    _fields lists the slots of the model and its bases"""
+
+    def __new__(mcs, name, bases, namespace):
+        """creates the model class with its defaults turned into slots"""
+        slots = tuple(namespace.get("__slots__", ()))
+        defaults = {key: value for key, value in namespace.items()
+                    if not key.startswith("_") and key not in slots and
+                    not hasattr(value, "__get__")}
+        for key in defaults:
+            del namespace[key]
+        namespace["__slots__"] = slots + tuple(defaults)
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._defaults = dict(getattr(cls, "_defaults", {}), **defaults)
+        cls._fields = getattr(cls, "_fields", ()) + tuple(
+            key for key in namespace["__slots__"] if key != "_extra")
+        return cls
+
+
+# JSON encoders shared by every call to to_json()
+encoder = json.JSONEncoder()
+sorted_encoder = json.JSONEncoder(sort_keys=True)
+
+
+def format_time(value):
+    """returns the datetime value formatted with time; same as
+    strftime(time), several times faster"""
+    return value.isoformat(timespec="microseconds")
+
+
+# last (milliseconds, counter) of uuid7()
+uuid7_last = (0, 0)
+uuid7_lock = threading.Lock()
+
+
+def uuid7():
+    """returns the text of a version 7 UUID: 48 bits of Unix time in
+    milliseconds, then a 12 bits counter for the ids of the same
+    millisecond, then random bits; ids made in a row sort in the order
+    they were made, and have the format of uuid4 ids"""
+    global uuid7_last
+    ms = time_ns() // 1000000
+    with uuid7_lock:
+        last_ms, counter = uuid7_last
+        if ms > last_ms:
+            counter = secrets.randbits(10)
+        elif counter < 0xfff:
+            ms, counter = last_ms, counter + 1
+        else:
+            ms, counter = last_ms + 1, 0
+        uuid7_last = (ms, counter)
+    return str(uuid.UUID(int=ms << 80 | 0x7 << 76 | counter << 64 |
+                         0x2 << 62 | secrets.randbits(62)))
+
+
+def uuid4():
+    """returns the text of a random UUID"""
+    return str(uuid.uuid4())
+
+
+# HBNB_ID_TYPE picks how new objects get their id: random "uuid4" ids, the
+# default, or time-ordered "uuid7" ids that keep inserts at the end of the
+# primary key index and let pages follow the id order
+id_types = {"uuid4": uuid4, "uuid7": uuid7}
+id_type = getenv("HBNB_ID_TYPE", "uuid4")
+if id_type not in id_types:
+    raise ValueError("HBNB_ID_TYPE must be one of {}".format(
+        ", ".join(sorted(id_types))))
+
+
+def new_id():
+    """returns the id of a new object, of the HBNB_ID_TYPE type"""
+    return id_types[id_type]()
+
+
+def parse_time(text):
+    """returns the datetime of text, a timestamp formatted with time; same
+    as strptime(text, time), several times faster"""
+    return datetime.fromisoformat(text)
+
+
+class Serializer:
+    """turns the attributes of the objects of a model class into their
+    dictionary, with what to leave out worked out once from the class: its
+    relationships, and the SQLAlchemy state in DBStorage"""
+
+    def __init__(self, cls):
+        """Instantiate the serializer of the model class cls"""
+        self.cls_name = cls.__name__
+        if models.storage_t == "db" and cls is not BaseModel:
+            self.drop = ("_sa_instance_state",) + tuple(
+                sqlalchemy.inspect(cls).relationships.keys())
+        else:
+            self.drop = tuple(name for name in dir(cls)
+                              if type(getattr(cls, name, None)) is property)
+        self.hide_password = models.storage_t == "db"
+
+    def to_dict(self, values):
+        """returns values, the attributes of an object, as its dictionary"""
+        for key in self.drop:
+            if key in values:
+                del values[key]
+        if "created_at" in values:
+            values["created_at"] = format_time(values["created_at"])
+        if "updated_at" in values:
+            values["updated_at"] = format_time(values["updated_at"])
+        values["__class__"] = self.cls_name
+        if self.hide_password and values.get("password"):
+            del values["password"]
+        return values
+
+
+serializers = {}
+
+
+def serializer(cls):
+    """returns the Serializer of the model class cls, built on first use"""
+    try:
+        return serializers[cls]
+    except KeyError:
+        return serializers.setdefault(cls, Serializer(cls))
+
+
+class Loader:
+    """builds the objects of a model class from their dictionaries, like
+    FileStorage stores them, with a plan worked out once from the class:
+    the attributes are set straight into the instance, in its __dict__ or
+    its slots, instead of through __init__ and __setattr__ one at a time.
+    Classes with their own __init__, such as User, still go through it"""
+
+    def __init__(self, cls):
+        """Instantiate the loader of the model class cls"""
+        self.cls = cls
+        self.construct = cls.__init__ is not BaseModel.__init__
+        self.fields = frozenset(getattr(cls, "_fields", ()))
+
+    def load(self, records):
+        """returns the objects of the dictionaries records, in order; the
+        dictionaries become the attributes of the objects"""
+        if self.construct:
+            return [self.cls(**record) for record in records]
+        objs = []
+        new = object.__new__
+        for record in records:
+            record.pop("__class__", None)
+            value = record.get("created_at")
+            if value and type(value) is str:
+                record["created_at"] = datetime.fromisoformat(value)
+            else:
+                record["created_at"] = datetime.utcnow()
+            value = record.get("updated_at")
+            if value and type(value) is str:
+                record["updated_at"] = datetime.fromisoformat(value)
+            else:
+                record["updated_at"] = datetime.utcnow()
+            if record.get("id") is None:
+                record["id"] = new_id()
+            obj = new(self.cls)
+            if compact:
+                self.__fill(obj, record)
+            else:
+                obj.__dict__.update(record)
+            objs.append(obj)
+        return objs
+
+    def __fill(self, obj, record):
+        """sets the attributes of record into the slots of the compact
+        object obj, and those its class does not declare into _extra"""
+        extra = None
+        for name, value in record.items():
+            if name in self.fields:
+                object.__setattr__(obj, name, value)
+            elif extra is None:
+                extra = {name: value}
+            else:
+                extra[name] = value
+        if extra is not None:
+            object.__setattr__(obj, "_extra", extra)
+
+
+loaders = {}
+
+
+def loader(cls):
+    """returns the Loader of the model class cls, built on first use"""
+    try:
+        return loaders[cls]
+    except KeyError:
+        return loaders.setdefault(cls, Loader(cls))
+
+
+class BaseModel(metaclass=Compact if compact else type):
     """The BaseModel class from which future classes will be derived"""
     if models.storage_t == "db":
         id = Column(String(60), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    elif compact:
+        # _extra holds the attributes the class does not declare
+        __slots__ = ("id", "created_at", "updated_at", "_extra")
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
@@ -33,24 +237,90 @@ class BaseModel:
                 if key != "__class__":
                     setattr(self, key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
+                self.created_at = parse_time(kwargs["created_at"])
             else:
                 self.created_at = datetime.utcnow()
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
+                self.updated_at = parse_time(kwargs["updated_at"])
             else:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
-                self.id = str(uuid.uuid4())
+                self.id = new_id()
         else:
-            self.id = str(uuid.uuid4())
+            self.id = new_id()
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    if compact:
+        def __getattr__(self, name):
+            """returns an attribute the class does not declare, or the
+            default of one that is not set"""
+            try:
+                return object.__getattribute__(self, "_extra")[name]
+            except (AttributeError, KeyError):
+                pass
+            try:
+                return type(self)._defaults[name]
+            except KeyError:
+                raise AttributeError("'{}' object has no attribute '{}'".
+                                     format(type(self).__name__,
+                                            name)) from None
+
+        def __setattr__(self, name, value):
+            """sets an attribute, in its slot when the class declares it,
+            and reports the change to the storage"""
+            old = self.__stored(name)
+            if hasattr(type(self), name):
+                object.__setattr__(self, name, value)
+            else:
+                try:
+                    object.__getattribute__(self, "_extra")[name] = value
+                except AttributeError:
+                    object.__setattr__(self, "_extra", {name: value})
+            if old != value:
+                models.storage.changed(self, name, old)
+
+        def __stored(self, name):
+            """returns the value of an attribute set on the instance, None
+            if it is not"""
+            try:
+                if name in type(self)._fields:
+                    return object.__getattribute__(self, name)
+                return object.__getattribute__(self, "_extra").get(name)
+            except AttributeError:
+                return None
+
+        def __values(self):
+            """returns the attributes set on the instance"""
+            values = {}
+            for name in self._fields:
+                try:
+                    values[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+            try:
+                values.update(object.__getattribute__(self, "_extra"))
+            except AttributeError:
+                pass
+            return values
+    else:
+        if models.storage_t != "db":
+            def __setattr__(self, name, value):
+                """sets an attribute and reports the change to the
+                storage"""
+                old = self.__dict__.get(name)
+                super().__setattr__(name, value)
+                if old != value:
+                    models.storage.changed(self, name, old)
+
+        def __values(self):
+            """returns the attributes set on the instance"""
+            return self.__dict__.copy()
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
-                                         self.__dict__)
+                                         self.__values())
 
     def save(self):
         """updates the attribute 'updated_at' with the current datetime"""
@@ -58,26 +328,28 @@ class BaseModel:
         models.storage.new(self)
         models.storage.save()
 
-    def to_dict(self):
-        """returns a dictionary containing all keys/values of the instance"""
-        new_dict = self.__dict__.copy()
-        if "created_at" in new_dict:
-            new_dict["created_at"] = new_dict["created_at"].strftime(time)
-        if "updated_at" in new_dict:
-            new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
-        new_dict["__class__"] = self.__class__.__name__
-        if "_sa_instance_state" in new_dict:
-            del new_dict["_sa_instance_state"]
-        if models.storage_t == "db" and new_dict.get('password'):
-            del new_dict['password']
-        if self.__class__.__name__ == 'Place':
-            try:
-                del new_dict['amenities']
-            except KeyError as error:
-                pass
-            #  amenities_list = [item.name for item in self.amenities]
-            #  new_dict['amenities'] = amenities_list
-        return new_dict
+    def to_dict(self, fields=None):
+        """returns a dictionary containing all keys/values of the instance,
+        or only those of the attributes named in fields"""
+        values = self.__values()
+        if fields is not None:
+            values = {key: values[key] for key in fields if key in values}
+        return serializer(type(self)).to_dict(values)
+
+    def to_json(self, sort_keys=False, fields=None):
+        """returns the JSON bytes of the dictionary of the instance, or of
+        only the attributes named in fields"""
+        if sort_keys:
+            return sorted_encoder.encode(self.to_dict(fields)).encode()
+        return encoder.encode(self.to_dict(fields)).encode()
+
+    def changed_fields(self):
+        """returns the set of the names of the attributes that changed
+        since the instance was last saved"""
+        if models.storage_t == "db":
+            return {attr.key for attr in sqlalchemy.inspect(self).attrs
+                    if attr.history.has_changes()}
+        return models.storage.changed_fields(self)
 
     def delete(self):
         """delete the current instance from the storage"""
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+Contains the LRUCache class
+"""
+
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+    """thread-safe cache keeping the size most recently used entries; each
+    key is a tuple starting with the class name its value comes from, so
+    that the entries of a class are dropped when it changes"""
+
+    def __init__(self, size):
+        """Instantiate an empty cache of at most size entries"""
+        self.size = size
+        self.__entries = OrderedDict()
+        self.__generations = {}
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self):
+        """returns the number of entries"""
+        return len(self.__entries)
+
+    def generation(self, cls_name):
+        """returns the generation of the class cls_name, to read before
+        querying the values to put in the cache"""
+        return self.__generations.get(cls_name, 0)
+
+    def get(self, key):
+        """returns the value cached under key, None if there is none"""
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def put(self, key, value, generation):
+        """caches value under key, unless the class of key changed since
+        its generation was read, evicting the least recently used entries
+        beyond size"""
+        with self.__lock:
+            if self.__generations.get(key[0], 0) != generation:
+                return
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def invalidate(self, cls_name, keys=None):
+        """drops the entries of keys and starts a new generation of the
+        class cls_name; all its entries when keys is None"""
+        with self.__lock:
+            self.__generations[cls_name] = self.generation(cls_name) + 1
+            if keys is None:
+                keys = [key for key in self.__entries if key[0] == cls_name]
+            for key in keys:
+                self.__entries.pop(key, None)
+
+    def stats(self):
+        """returns the size, entries, hits, misses and evictions"""
+        with self.__lock:
+            return {"size": self.size, "entries": len(self.__entries),
+                    "hits": self.__hits, "misses": self.__misses,
+                    "evictions": self.__evictions}
@@ -7,67 +7,543 @@ import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
 from models.city import City
+from models.engine.cache import LRUCache
+from models.engine import migrations
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from collections import deque
+import itertools
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, event, func, insert, inspect, select
+from sqlalchemy import Select
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm import scoped_session, selectinload, Session
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import threading
+import time
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# create_engine pool arguments by HBNB_MYSQL_* environment variable
+pool_variables = {"HBNB_MYSQL_POOL_SIZE": ("pool_size", int),
+                  "HBNB_MYSQL_MAX_OVERFLOW": ("max_overflow", int),
+                  "HBNB_MYSQL_POOL_TIMEOUT": ("pool_timeout", float),
+                  "HBNB_MYSQL_POOL_RECYCLE": ("pool_recycle", int),
+                  "HBNB_MYSQL_PRE_PING": ("pool_pre_ping",
+                                          lambda value: value.lower() in
+                                          ("1", "true", "yes", "on"))}
+
+
+def pool_settings():
+    """returns the create_engine pool arguments set by the environment,
+    SQLAlchemy defaults apply to the others"""
+    settings = {}
+    for variable, (argument, cast) in pool_variables.items():
+        value = getenv(variable)
+        if value is not None:
+            settings[argument] = cast(value)
+    return settings
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that records its checkouts and how long they waited for a
+    connection"""
+    # float - seconds of checkouts used for the checkouts per second rate
+    rate_window = 60.0
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a pool with empty statistics"""
+        super().__init__(*args, **kwargs)
+        self.__lock = threading.Lock()
+        self.__started = time.monotonic()
+        self.__recent = deque()
+        self.__checkouts = 0
+        self.__wait_time = 0.0
+        self.__max_wait = 0.0
+
+    def _do_get(self):
+        """checks a connection out, timing the wait for a free one"""
+        start = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            end = time.monotonic()
+            with self.__lock:
+                self.__checkouts += 1
+                self.__wait_time += end - start
+                self.__max_wait = max(self.__max_wait, end - start)
+                self.__recent.append(end)
+
+    def stats(self):
+        """returns the live statistics of the pool"""
+        now = time.monotonic()
+        with self.__lock:
+            while self.__recent and \
+                    self.__recent[0] < now - self.rate_window:
+                self.__recent.popleft()
+            window = min(self.rate_window, now - self.__started) or 1.0
+            return {"size": self.size(),
+                    "checked_in": self.checkedin(),
+                    "checked_out": self.checkedout(),
+                    "overflow": max(self.overflow(), 0),
+                    "checkouts": self.__checkouts,
+                    "checkouts_per_second": len(self.__recent) / window,
+                    "wait_time": self.__wait_time,
+                    "max_wait": self.__max_wait}
+
+
+def engine_stats(engine):
+    """returns the live statistics of the connection pool of engine"""
+    if isinstance(engine.pool, MonitoredQueuePool):
+        return engine.pool.stats()
+    return {"status": engine.pool.status()}
+
+
+class Replicas:
+    """read replica engines, and the policy that chooses one of them for
+    each read session: "round_robin" or "least_load", the replica with the
+    fewest checked out connections"""
+
+    def __init__(self, engines, policy="round_robin"):
+        """Instantiate a set of replicas"""
+        if policy not in ("round_robin", "least_load"):
+            raise ValueError("unknown replica policy {}".format(policy))
+        self.engines = list(engines)
+        self.policy = policy
+        self.__turn = itertools.count()
+
+    def __len__(self):
+        """returns the number of replicas"""
+        return len(self.engines)
+
+    def choose(self):
+        """returns the engine of the next replica to read from"""
+        turn = next(self.__turn) % len(self.engines)
+        engines = self.engines[turn:] + self.engines[:turn]
+        if self.policy == "least_load":
+            # ties go round-robin, since min keeps the first one
+            return min(engines, key=lambda engine:
+                       getattr(engine.pool, "checkedout", lambda: 0)())
+        return engines[0]
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica engine stored in its info by
+    DBStorage.use_replicas(), until it writes: flushes and statements other
+    than SELECT go to the primary engine, and so do all the statements of
+    the session after them"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        """returns the engine a statement of the session runs on"""
+        if self._flushing or \
+           (clause is not None and not isinstance(clause, Select)):
+            self.info["wrote"] = True
+        replica = self.info.get("replica")
+        if replica is None or self.info.get("wrote"):
+            return super().get_bind(mapper, clause=clause, **kw)
+        return replica
+
 
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    __replicas = None
+    # LRUCache - rows, collections and counts shared by all the sessions,
+    # by (class name, "row", id), (class name, "all") and (class name,
+    # "count"); None when disabled
+    __cache = None
+    # integer - classes with at most that many objects are cached whole
+    collection_limit = int(getenv('HBNB_CACHE_COLLECTION_LIMIT', 1000))
 
-    def __init__(self):
-        """Instantiate a DBStorage object"""
+    def __init__(self, engine=None, replicas=None, cache_size=None):
+        """Instantiate a DBStorage object, on the MySQL database set by the
+        HBNB_MYSQL_* environment variables unless an engine is given;
+        replicas is a list of read replica URLs or engines, the comma
+        separated URLs of HBNB_MYSQL_REPLICAS by default, and cache_size
+        the number of entries of the cache, HBNB_CACHE_SIZE or 0 to
+        disable it by default"""
         HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
         HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        if engine is None:
+            engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
+                                   format(HBNB_MYSQL_USER,
+                                          HBNB_MYSQL_PWD,
+                                          HBNB_MYSQL_HOST,
+                                          HBNB_MYSQL_DB),
+                                   poolclass=MonitoredQueuePool,
+                                   **pool_settings())
+            if replicas is None and getenv('HBNB_MYSQL_REPLICAS'):
+                replicas = getenv('HBNB_MYSQL_REPLICAS').split(',')
+        self.__engine = engine
+        if replicas:
+            self.__replicas = Replicas(
+                [create_engine(replica.strip(), poolclass=MonitoredQueuePool,
+                               **pool_settings())
+                 if type(replica) is str else replica
+                 for replica in replicas],
+                getenv('HBNB_MYSQL_REPLICA_POLICY', 'round_robin'))
+        if cache_size is None:
+            cache_size = int(getenv('HBNB_CACHE_SIZE', 0))
+        if cache_size > 0:
+            self.__cache = LRUCache(cache_size)
+        started = time.perf_counter()
         if HBNB_ENV == "test":
-            Base.metadata.drop_all(self.__engine)
+            migrations.reset(self.__engine)
+        self.__startup = {"reset_seconds": time.perf_counter() - started}
+
+    def __options(self, cls, prefetch):
+        """returns the loader options that load the relationship paths of
+        prefetch, like "cities.places", along with the cls objects: each
+        collection with one more SELECT ... IN query, and each many-to-one
+        relationship joined to the query"""
+        options = []
+        for path in prefetch or ():
+            option = None
+            target = cls
+            for name in path.split("."):
+                attr = getattr(target, name)
+                if attr.property.uselist:
+                    loader = selectinload
+                else:
+                    loader = joinedload
+                if option is None:
+                    option = loader(attr)
+                else:
+                    option = getattr(option, loader.__name__)(attr)
+                target = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def __cacheable(self, cls=None, prefetch=None):
+        """tells if the current session may use the cache: it has no change
+        that is not committed yet, and the relationship paths of prefetch
+        from cls only follow plain foreign keys"""
+        if self.__cache is None:
+            return False
+        session = self.__session()
+        if session.new or session.dirty or session.deleted or \
+           session.info.get("changed"):
+            return False
+        for path in prefetch or ():
+            target = cls
+            for name in path.split("."):
+                prop = getattr(target, name).property
+                if prop.secondary is not None or \
+                   len(prop.local_remote_pairs) != 1:
+                    return False
+                target = prop.mapper.class_
+        return True
+
+    def __row(self, obj):
+        """returns the column values of obj"""
+        return {attr.key: obj.__dict__[attr.key]
+                for attr in inspect(type(obj)).column_attrs
+                if attr.key in obj.__dict__}
+
+    def __instance(self, cls, row):
+        """returns the cls object of a cached row in the current session,
+        without querying the database"""
+        session = self.__session()
+        obj = session.identity_map.get(Session.identity_key(cls, row["id"]))
+        if obj is None:
+            obj = inspect(cls).class_manager.new_instance()
+            for key, value in row.items():
+                set_committed_value(obj, key, value)
+            make_transient_to_detached(obj)
+            session.add(obj)
+        return obj
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def __cached(self, cls, id):
+        """returns the cls object id of the session or of the cache, None
+        if neither has it"""
+        obj = self.__session().identity_map.get(
+            Session.identity_key(cls, id))
+        if obj is None:
+            row = self.__cache.get((cls.__name__, "row", id))
+            if row is not None:
+                obj = self.__instance(cls, row)
+        return obj
+
+    def __cache_rows(self, objs, generation):
+        """caches the rows of objs, objects of one class read from the
+        database in the generation of their class"""
+        for obj in objs:
+            self.__cache.put((type(obj).__name__, "row", obj.id),
+                             self.__row(obj), generation)
+
+    def __cached_all(self, cls):
+        """returns the objects of cls in id order, from the cache when the
+        class has at most collection_limit objects, None otherwise"""
+        rows = self.__cache.get((cls.__name__, "all"))
+        if rows is not None:
+            return [self.__instance(cls, row) for row in rows]
+        generation = self.__cache.generation(cls.__name__)
+        if self.count(cls) > self.collection_limit:
+            return None
+        objs = self.__session.query(cls).order_by(cls.id).all()
+        self.__cache_rows(objs, generation)
+        self.__cache.put((cls.__name__, "all"),
+                         tuple(self.__row(obj) for obj in objs), generation)
+        return objs
+
+    def __cached_prefetch(self, cls, objs, prefetch):
+        """loads the relationship paths of prefetch of the cls objects objs
+        from the cached collections of the related classes; returns False
+        when a related class is too large to be cached whole"""
+        for path in prefetch or ():
+            parents = objs
+            target = cls
+            for name in path.split("."):
+                prop = getattr(target, name).property
+                children = self.__cached_all(prop.mapper.class_)
+                if children is None:
+                    return False
+                local, remote = prop.local_remote_pairs[0]
+                related = {}
+                for child in children:
+                    if prop.uselist:
+                        related.setdefault(getattr(child, remote.key),
+                                           []).append(child)
+                    else:
+                        related[getattr(child, remote.key)] = child
+                loaded = []
+                for parent in parents:
+                    if name not in parent.__dict__:
+                        set_committed_value(parent, name, related.get(
+                            getattr(parent, local.key),
+                            [] if prop.uselist else None))
+                    value = parent.__dict__[name]
+                    if prop.uselist:
+                        loaded.extend(value)
+                    elif value is not None:
+                        loaded.append(value)
+                parents = loaded
+                target = prop.mapper.class_
+        return True
+
+    def __after_flush(self, session, flush_context):
+        """records the objects a flush wrote, to drop their cache entries
+        when the transaction commits, and the classes whose count it
+        changed; objects of session.dirty without a changed column are
+        left out"""
+        changed = session.info.setdefault("changed", {})
+        resized = session.info.setdefault("resized", set())
+        written = list(itertools.chain(session.new, session.deleted))
+        for obj in written:
+            resized.add(type(obj).__name__)
+        written.extend(obj for obj in session.dirty if session.is_modified(
+            obj, include_collections=False))
+        for obj in written:
+            ids = changed.setdefault(type(obj).__name__, set())
+            if ids is not None:
+                ids.add(obj.id)
+
+    def __after_execute(self, orm_execute_state):
+        """records the classes written by ORM statements other than SELECT,
+        to drop their cache entries when the transaction commits"""
+        mapper = orm_execute_state.bind_mapper
+        if orm_execute_state.is_select or mapper is None:
+            return
+        changed = orm_execute_state.session.info.setdefault("changed", {})
+        if orm_execute_state.is_insert:
+            changed.setdefault(mapper.class_.__name__, set())
+            orm_execute_state.session.info.setdefault(
+                "resized", set()).add(mapper.class_.__name__)
+        else:
+            changed[mapper.class_.__name__] = None
+
+    def __after_commit(self, session):
+        """drops the cache entries of what the transaction changed: the
+        count of a class only survives updates of its objects"""
+        resized = session.info.pop("resized", set())
+        for name, ids in session.info.pop("changed", {}).items():
+            if ids is None:
+                self.__cache.invalidate(name)
+            else:
+                keys = [(name, "all")] + [(name, "row", id) for id in ids]
+                if name in resized:
+                    keys.append((name, "count"))
+                self.__cache.invalidate(name, keys)
+
+    def __after_rollback(self, session):
+        """forgets the changes of a transaction rolled back"""
+        session.info.pop("changed", None)
+        session.info.pop("resized", None)
+
+    def all(self, cls=None, prefetch=None):
+        """query on the current database session, loading the relationship
+        paths of prefetch along with the cls objects; classes small enough
+        are read from the cache"""
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                objs = None
+                if self.__cacheable(classes[clss], prefetch):
+                    objs = self.__cached_all(classes[clss])
+                    if objs is not None and not self.__cached_prefetch(
+                            classes[clss], objs, prefetch):
+                        objs = None
+                if objs is None:
+                    options = self.__options(classes[clss], prefetch)
+                    objs = self.__session.query(classes[clss]).options(
+                        *options).all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
         return (new_dict)
 
+    def iterate(self, cls=None, order_by="id", offset=0, limit=None,
+                page_size=1000, prefetch=None, after=None):
+        """returns a lazy iterator over the objects of cls, all classes in
+        name order by default, ordered by the column order_by ("-" in front
+        for descending order) then by id; it skips the first offset objects,
+        stops after limit objects and fetches page_size rows at a time from
+        a server side cursor, along with the relationship paths of
+        prefetch
+
+        after is a keyset cursor: the id of the last object of the previous
+        page, ordered by id, to start the iteration right after with an
+        index range scan instead of an OFFSET"""
+        if after is not None and (cls is None or order_by.lstrip("-") != "id"):
+            raise ValueError("after needs a class and ordering by id")
+        if cls is None:
+            clss = [classes[name] for name in sorted(classes)]
+        else:
+            clss = [classes.get(cls, cls)]
+        attr = order_by.lstrip("-")
+        for cls in clss:
+            if limit is not None and limit <= 0:
+                return
+            if cls not in classes.values():
+                continue
+            if offset:
+                count = self.count(cls)
+                if offset >= count:
+                    offset -= count
+                    continue
+            objs = None
+            if attr == "id" and self.__cacheable(cls, prefetch):
+                objs = self.__cached_all(cls)
+                if objs is not None and not self.__cached_prefetch(
+                        cls, objs, prefetch):
+                    objs = None
+            if objs is not None:
+                if order_by.startswith("-"):
+                    objs.reverse()
+                if after is not None:
+                    objs = [obj for obj in objs
+                            if (obj.id < after if order_by.startswith("-")
+                                else obj.id > after)]
+                end = None if limit is None else offset + limit
+                objs = objs[offset:end]
+                offset = 0
+                if limit is not None:
+                    limit -= len(objs)
+                yield from objs
+                continue
+            columns = [getattr(cls, attr)]
+            if attr != "id":
+                columns.append(cls.id)
+            if order_by.startswith("-"):
+                columns = [column.desc() for column in columns]
+            query = self.__session.query(cls).order_by(*columns)
+            if after is not None:
+                query = query.filter(cls.id < after
+                                     if order_by.startswith("-")
+                                     else cls.id > after)
+            query = query.options(*self.__options(cls, prefetch))
+            query = query.offset(offset).limit(limit).yield_per(page_size)
+            offset = 0
+            for obj in query:
+                if limit is not None:
+                    limit -= 1
+                yield obj
+
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
 
+    def bulk_new(self, objs):
+        """add every object of objs to the current database session"""
+        self.__session.add_all(objs)
+
     def save(self):
         """commit all changes of the current database session"""
         self.__session.commit()
 
+    def bulk_save(self, objs, batch_size=1000):
+        """inserts the objects of objs with executemany INSERTs of
+        batch_size rows, parent tables first, then commits them along
+        with the changes of the session like save(); if an INSERT fails
+        the whole transaction is rolled back. Only column attributes are
+        inserted, many-to-many collections are not. Raises ValueError,
+        before writing anything, if objs holds objects that are not new
+        objects of a model"""
+        rejected = [obj for obj in objs if type(obj) not in classes.values() or
+                    not inspect(obj).transient]
+        if rejected:
+            raise ValueError("bulk_save only inserts new objects: {}".format(
+                ", ".join("{}.{}".format(type(obj).__name__,
+                                         getattr(obj, "id", None))
+                          for obj in rejected[:10])))
+        tables = {table: i for i, table in
+                  enumerate(Base.metadata.sorted_tables)}
+        by_class = {}
+        for obj in objs:
+            by_class.setdefault(type(obj), []).append(obj)
+        try:
+            # the pending changes go first, in the same transaction
+            self.__session.flush()
+            for cls in sorted(by_class,
+                              key=lambda cls: tables[cls.__table__]):
+                keys = [attr.key for attr in inspect(cls).column_attrs]
+                # in id order, so that time-ordered ids append to the index
+                objs = sorted(by_class[cls], key=lambda obj: obj.id)
+                for i in range(0, len(objs), batch_size):
+                    batch = objs[i:i + batch_size]
+                    self.__session.execute(insert(cls), [
+                        {key: obj.__dict__[key] for key in keys
+                         if key in obj.__dict__} for obj in batch])
+            self.__session.commit()
+        except Exception:
+            self.__session.rollback()
+            raise
+        inserted = [obj for batch in by_class.values() for obj in batch]
+        for obj in inserted:
+            make_transient_to_detached(obj)
+        self.__session.add_all(inserted)
+
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
             self.__session.delete(obj)
 
     def reload(self):
-        """reloads data from the database"""
-        Base.metadata.create_all(self.__engine)
-        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        """upgrades the schema of the database to the last migration, then
+        starts the session"""
+        started = time.perf_counter()
+        self.__startup["migrations_applied"] = \
+            migrations.migrate(self.__engine)
+        self.__startup["schema_seconds"] = time.perf_counter() - started
+        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False,
+                                    class_=RoutingSession)
+        if self.__cache is not None:
+            event.listen(sess_factory, "after_flush", self.__after_flush)
+            event.listen(sess_factory, "do_orm_execute",
+                         self.__after_execute)
+            event.listen(sess_factory, "after_commit", self.__after_commit)
+            event.listen(sess_factory, "after_rollback",
+                         self.__after_rollback)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
@@ -75,10 +551,130 @@ class DBStorage:
         """call remove() method on the private session attribute"""
         self.__session.remove()
 
-    def get(self, cls, id):
-        """retrieve one object"""
-        return self.all(cls).get("{}.{}".format(cls.__name__, id))
+    def use_replicas(self):
+        """sends the reads of the current session to a read replica, until
+        it writes or is closed; for read-only requests"""
+        if self.__replicas and "replica" not in self.__session.info:
+            self.__session.info["replica"] = self.__replicas.choose()
+
+    def get(self, cls, id, prefetch=None):
+        """retrieve one object by its primary key, from the session identity
+        map without querying the database when it is already loaded"""
+        cls = classes.get(cls, cls)
+        if id is None or cls not in classes.values():
+            return None
+        if not self.__cacheable(cls, prefetch):
+            return self.__session.get(cls, id,
+                                      options=self.__options(cls, prefetch))
+        obj = self.__cached(cls, id)
+        if obj is not None and self.__cached_prefetch(cls, [obj], prefetch):
+            return obj
+        generation = self.__cache.generation(cls.__name__)
+        obj = self.__session.get(cls, id,
+                                 options=self.__options(cls, prefetch))
+        if obj is not None:
+            self.__cache_rows([obj], generation)
+        return obj
+
+    def get_many(self, cls, ids, prefetch=None):
+        """retrieve the objects of a list of ids in one query, in the order
+        of the list; ids without an object are skipped"""
+        cls = classes.get(cls, cls)
+        if cls not in classes.values():
+            return []
+        ids = list(dict.fromkeys(id for id in ids if id is not None))
+        if not ids:
+            return []
+        found = {}
+        missing = ids
+        if self.__cacheable(cls, prefetch):
+            for id in ids:
+                obj = self.__cached(cls, id)
+                if obj is not None:
+                    found[id] = obj
+            if not self.__cached_prefetch(cls, list(found.values()),
+                                          prefetch):
+                found = {}
+            missing = [id for id in ids if id not in found]
+        if missing:
+            if self.__cache is not None:
+                generation = self.__cache.generation(cls.__name__)
+            query = self.__session.query(cls).options(
+                *self.__options(cls, prefetch))
+            objs = query.filter(cls.id.in_(missing)).all()
+            if self.__cacheable(cls, prefetch):
+                self.__cache_rows(objs, generation)
+            found.update((obj.id, obj) for obj in objs)
+        return [found[id] for id in ids if id in found]
+
+    def pool_stats(self):
+        """returns the live statistics of the connection pool, and of the
+        pools of the replicas if any"""
+        stats = engine_stats(self.__engine)
+        if self.__replicas:
+            stats["replicas"] = [engine_stats(engine)
+                                 for engine in self.__replicas.engines]
+        return stats
+
+    def schema_version(self):
+        """returns the version of the last migration applied to the
+        database"""
+        return migrations.schema_version(self.__engine)
+
+    def startup_stats(self):
+        """returns the seconds spent emptying the database in the test
+        environment and upgrading its schema at startup, and the
+        migrations applied; none when the schema was already current"""
+        return dict(self.__startup)
+
+    def missing_indexes(self):
+        """returns the indexes declared by the models that the database
+        lacks"""
+        return migrations.missing_indexes(self.__engine)
+
+    def cache_stats(self):
+        """returns the size, entries, hits, misses and evictions of the
+        cache"""
+        if self.__cache is None:
+            return {"size": 0, "entries": 0, "hits": 0, "misses": 0,
+                    "evictions": 0}
+        return self.__cache.stats()
 
     def count(self, cls=None):
-        """count number of objects in storage"""
-        return len(self.all(cls))
+        """count number of objects in storage with SELECT COUNT(*)"""
+        if cls is None:
+            return sum(self.counts().values())
+        cls = classes.get(cls, cls)
+        if cls not in classes.values():
+            return 0
+        return self.counts([cls])[cls.__name__]
+
+    def counts(self, clss=None):
+        """count the objects of each class of clss, all classes by default,
+        in a single query for the counts missing from the cache; returns
+        the counts by class name"""
+        if clss is None:
+            clss = classes.values()
+        clss = [classes.get(cls, cls) for cls in clss]
+        mapped = [cls for cls in clss if cls in classes.values()]
+        counts = {cls.__name__: 0 for cls in clss}
+        cacheable = self.__cacheable()
+        if cacheable:
+            generations = {}
+            for cls in mapped:
+                generations[cls] = self.__cache.generation(cls.__name__)
+                count = self.__cache.get((cls.__name__, "count"))
+                if count is not None:
+                    counts[cls.__name__] = count
+                    del generations[cls]
+            mapped = list(generations)
+        if mapped:
+            row = self.__session.execute(select(*[
+                select(func.count()).select_from(cls).scalar_subquery()
+                for cls in mapped])).one()
+            for cls, count in zip(mapped, row):
+                counts[cls.__name__] = count
+                if cacheable:
+                    self.__cache.put((cls.__name__, "count"), count,
+                                     generations[cls])
+        return counts
@@ -3,76 +3,952 @@
 Contains the FileStorage class
 """
 
+import bisect
+import fcntl
 import json
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, loader, parse_time
 from models.city import City
+from models.engine import snapshot
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+import os
+import threading
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# foreign key attributes of each class, indexed by parent id
+foreign_keys = {"City": ("state_id",), "Place": ("city_id", "user_id"),
+                "Review": ("place_id", "user_id")}
+
+# file name of the shard of each class when storing one file per class
+shard_files = {"Amenity": "amenities.json", "BaseModel": "base_models.json",
+               "City": "cities.json", "Place": "places.json",
+               "Review": "reviews.json", "State": "states.json",
+               "User": "users.json"}
+
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
-    # string - path to the JSON file
-    __file_path = "file.json"
+    # boolean - use the binary snapshot format instead of JSON
+    __binary = os.getenv("HBNB_TYPE_STORAGE") == "binary"
+    # string - path to the JSON file, or to the binary snapshot
+    __file_path = "file.hbnb" if __binary else "file.json"
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - records read from the file and not instantiated yet,
+    # by <class name>.id (a key is either in __objects or in __raw); with
+    # the binary format, a record not decoded yet is its snapshot offset
+    __raw = {}
+    # integer - raw records all() instantiates at once
+    load_batch = int(os.getenv("HBNB_FILE_LOAD_BATCH", 1000))
+    # Snapshot - memory-mapped binary snapshot the offsets of __raw are in;
+    # it is the index of the records nothing used yet: their keys are only
+    # added to __raw once their class is listed or they are looked up
+    __snapshot = None
+    # set - classes whose snapshot keys are all in __class_index
+    __listed = set()
+    # set - snapshot keys deleted here since the snapshot was read
+    __dropped = set()
+    # set - classes whose snapshot records are not in __fk_index yet
+    __fk_deferred = set()
+    # dictionary - <class name>.id keys of __objects by <class name>
+    # (dictionaries with None values are used as ordered sets)
+    __class_index = {}
+    # dictionary - ordered key index: (bucket, sorted keys) by class name,
+    # valid while the bucket is the one of __class_index
+    __sorted = {}
+    # dictionary - <class name>.id keys by parent id by <class name>.<fk>
+    __fk_index = {}
+    # boolean - append changes to a journal instead of rewriting the file
+    __journal = bool(os.getenv("HBNB_FILE_JOURNAL"))
+    # integer - journal size in bytes that triggers a compaction
+    __journal_limit = int(os.getenv("HBNB_FILE_JOURNAL_LIMIT", 4 * 2 ** 20))
+    # dictionary - <class name>.id keys changed since the last save: None
+    # when the whole object must be written, or the set of the names of
+    # its attributes that changed
+    __pending = {}
+    # set - <class name>.id keys deleted since the last save
+    __deleted = set()
+    # dictionary - serialized form of the objects that did not change since
+    # they were last written, by <class name>.id: the JSON bytes of their
+    # dictionary, or their record offset in __snapshot
+    __fragments = {}
+    # integer - objects serialized and objects written by the last save
+    __serialized = 0
+    __written = 0
+    # tuple - (inode, size, mtime) of __file_path when it was last read
+    __file_stamp = None
+    # integer - inode of the journal and bytes of it already applied
+    __journal_ino = None
+    __journal_offset = 0
+    # string - directory holding one file per class instead of __file_path
+    __shard_dir = os.getenv("HBNB_FILE_SHARDS")
+    # dictionary - (inode, size, mtime) of each loaded shard by <class name>
+    __loaded = {}
+    # RLock - held by every change to the attributes above; readers never
+    # take it, they iterate over copies of the index buckets instead
+    __lock = threading.RLock()
+
+    def __class_name(self, cls):
+        """returns the class name of cls, given as a class or a string"""
+        if type(cls) is str:
+            return cls
+        return cls.__name__
+
+    def __attr(self, obj, attr):
+        """returns attr of an object or of a raw record, None if unset"""
+        if type(obj) is dict:
+            return obj.get(attr)
+        return getattr(obj, attr, None)
+
+    def __index(self, key, obj):
+        """adds the key of obj to the class and foreign key indexes"""
+        cls_name = key.partition(".")[0]
+        bucket = self.__class_index.setdefault(cls_name, {})
+        if key not in bucket:
+            bucket[key] = None
+            self.__sorted.pop(cls_name, None)
+        for attr in foreign_keys.get(cls_name, ()):
+            parent_id = self.__attr(obj, attr)
+            if parent_id:
+                fk = self.__fk_index.setdefault(cls_name + "." + attr, {})
+                fk.setdefault(parent_id, {})[key] = None
+
+    def __unindex(self, key, obj):
+        """removes the key of obj from the class and foreign key indexes"""
+        cls_name = key.partition(".")[0]
+        bucket = self.__class_index.get(cls_name, {})
+        if key in bucket:
+            del bucket[key]
+            self.__sorted.pop(cls_name, None)
+        for attr in foreign_keys.get(cls_name, ()):
+            self.__unindex_fk(key, cls_name + "." + attr,
+                              self.__attr(obj, attr))
+
+    def __unindex_fk(self, key, fk, parent_id):
+        """removes key from the parent_id bucket of the fk index"""
+        fk_index = self.__fk_index.get(fk, {})
+        children = fk_index.get(parent_id)
+        if children is not None:
+            children.pop(key, None)
+            if not children:
+                del fk_index[parent_id]
+
+    def __lookup(self, key):
+        """returns the object stored under key, instantiating it from its
+        raw record the first time it is accessed"""
+        obj = self.__objects.get(key)
+        if obj is None and key in self.__raw:
+            with self.__lock:
+                obj = self.__objects.get(key)
+                value = self.__raw.get(key)
+                if obj is None and value is not None:
+                    if type(value) is int:
+                        self.__fragments[key] = value
+                    value = self.__record(key, value)
+                    obj = loader(classes[value["__class__"]]).load([value])[0]
+                    # stored before the record is dropped, so that other
+                    # threads always find one or the other
+                    self.__objects[key] = obj
+                    del self.__raw[key]
+        return obj
+
+    def __load(self, keys):
+        """instantiates the raw records stored under keys, load_batch keys
+        at a time, each class of a batch loaded at once by its loader"""
+        keys = [key for key in keys if key in self.__raw]
+        for start in range(0, len(keys), self.load_batch):
+            with self.__lock:
+                batches = {}
+                for key in keys[start:start + self.load_batch]:
+                    value = self.__raw.get(key)
+                    if value is None or key in self.__objects:
+                        continue
+                    if type(value) is int:
+                        self.__fragments[key] = value
+                    value = self.__record(key, value)
+                    batches.setdefault(value["__class__"], ([], []))
+                    batches[value["__class__"]][0].append(key)
+                    batches[value["__class__"]][1].append(value)
+                for cls_name, (batch, records) in batches.items():
+                    objs = loader(classes[cls_name]).load(records)
+                    for key, obj in zip(batch, objs):
+                        self.__objects[key] = obj
+                        del self.__raw[key]
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def all(self, cls=None, prefetch=None):
+        """returns a dictionary of the objects of cls, all objects by
+        default, that later changes to the storage leave as it is;
+        prefetch is only used by DBStorage, relationships are index
+        lookups here"""
         if cls is not None:
             new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
+            self.__list([self.__class_name(cls)])
+            keys = tuple(self.__class_index.get(self.__class_name(cls), ()))
+            self.__load(keys)
+            for key in keys:
+                obj = self.__lookup(key)
+                if obj is not None:
+                    new_dict[key] = obj
             return new_dict
-        return self.__objects
+        self.__list(classes)
+        self.__load(list(self.__raw))
+        return self.__objects.copy()
+
+    def __sorted_keys(self, cls_name):
+        """returns the keys of the class cls_name in sorted order, sorting
+        them again only when the class gained or lost keys"""
+        entry = self.__sorted.get(cls_name)
+        if entry is None or \
+           entry[0] is not self.__class_index.get(cls_name):
+            with self.__lock:
+                bucket = self.__class_index.get(cls_name, {})
+                entry = (bucket, sorted(bucket))
+                self.__sorted[cls_name] = entry
+        return entry[1]
+
+    def __sort_value(self, key, attr):
+        """returns the sort key of the object stored under key by attr,
+        unset values first; a raw record gives the same value as its
+        object would once loaded: its timestamps parsed, and the class
+        default for an attribute it does not have"""
+        value = self.__stored(key)
+        if type(value) is int:
+            value = self.__record(key, value)
+        if type(value) is not dict:
+            value = getattr(value, attr, None)
+        elif attr in value:
+            value = value[attr]
+            if attr in ("created_at", "updated_at") and type(value) is str:
+                value = parse_time(value)
+        else:
+            value = self.__default(key.partition(".")[0], attr)
+        return (value is not None, value)
+
+    def __default(self, cls_name, attr):
+        """returns the default value of attr of the class cls_name, None if
+        it has none"""
+        cls = classes.get(cls_name)
+        defaults = getattr(cls, "_defaults", None)
+        if defaults is not None:
+            return defaults.get(attr)
+        value = getattr(cls, attr, None)
+        if hasattr(value, "__get__"):
+            return None
+        return value
+
+    def iterate(self, cls=None, order_by="id", offset=0, limit=None,
+                page_size=1000, prefetch=None, after=None):
+        """returns a lazy iterator over the objects of cls, all classes in
+        name order by default, ordered by the attribute order_by ("-" in
+        front for descending order) then by id; it skips the first offset
+        objects and stops after limit objects; page_size records are
+        instantiated at once, and prefetch is only used by DBStorage
+
+        after is a keyset cursor: the id of the last object of the previous
+        page, ordered by id, to start the iteration right after"""
+        if after is not None and (cls is None or order_by.lstrip("-") != "id"):
+            raise ValueError("after needs a class and ordering by id")
+        if cls is None:
+            names = sorted(classes)
+        else:
+            names = [self.__class_name(cls)]
+        attr = order_by.lstrip("-")
+        reverse = order_by.startswith("-")
+        for cls_name in names:
+            if limit is not None and limit <= 0:
+                return
+            self.__list([cls_name])
+            keys = self.__sorted_keys(cls_name)
+            if after is not None:
+                cursor = cls_name + "." + after
+                if reverse:
+                    keys = keys[:bisect.bisect_left(keys, cursor)]
+                else:
+                    keys = keys[bisect.bisect_right(keys, cursor):]
+            if offset >= len(keys):
+                offset -= len(keys)
+                continue
+            if attr != "id":
+                keys = sorted(keys,
+                              key=lambda key: self.__sort_value(key, attr))
+            if reverse:
+                keys = keys[::-1]
+            for i in range(offset, len(keys)):
+                if (i - offset) % page_size == 0:
+                    self.__load(keys[i:i + page_size])
+                obj = self.__lookup(keys[i])
+                if obj is None:
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield obj
+            offset = 0
+
+    def __record(self, key, value):
+        """returns the dictionary of a raw record, decoding it from the
+        snapshot if value is an offset"""
+        if type(value) is int:
+            return self.__snapshot.record(value, key)
+        return value
+
+    def __stored(self, key):
+        """returns the object or raw record stored under key, or None"""
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = self.__raw.get(key)
+        return obj
+
+    def __put(self, key, obj):
+        """stores obj under key in __objects and indexes it"""
+        self.__store(key, obj, self.__objects, self.__raw)
+
+    def __put_raw(self, key, value):
+        """stores the raw record value under key in __raw and indexes it"""
+        self.__store(key, value, self.__raw, self.__objects)
+
+    def __store(self, key, value, store, other):
+        """stores value under key in store, drops what other holds under
+        key, and moves key to the index buckets of value; key is added to
+        its new buckets before it leaves the old ones, so that readers
+        never miss it"""
+        old = self.__stored(key)
+        store[key] = value
+        other.pop(key, None)
+        self.__dropped.discard(key)
+        self.__fragments.pop(key, None)
+        self.__index(key, value)
+        if old is not None:
+            cls_name = key.partition(".")[0]
+            for attr in foreign_keys.get(cls_name, ()):
+                parent_id = self.__attr(old, attr)
+                if parent_id != self.__attr(value, attr):
+                    self.__unindex_fk(key, cls_name + "." + attr, parent_id)
+
+    def __remove(self, key):
+        """removes the object or raw record stored under key"""
+        self.__fragments.pop(key, None)
+        if key in self.__objects:
+            self.__unindex(key, self.__objects.pop(key))
+        elif key in self.__raw:
+            self.__unindex(key, self.__raw.pop(key))
+
+    def __touch(self, key, attr=None):
+        """marks the object stored under key as changed since the last
+        save, so that it is serialized again; only its attribute attr if
+        given, unless the whole object is already to be written"""
+        self.__deleted.discard(key)
+        fields = self.__pending.get(key, set())
+        if attr is None:
+            self.__pending[key] = None
+        elif fields is not None:
+            fields.add(attr)
+            self.__pending[key] = fields
+        self.__fragments.pop(key, None)
+
+    def __unsaved(self, key):
+        """tells if key has changes not saved yet, that the records read
+        from disk must not replace; an object kept that way is written
+        whole by the next save, over the record read"""
+        if key in self.__deleted:
+            return True
+        if key in self.__pending:
+            self.__pending[key] = None
+            self.__fragments.pop(key, None)
+            return True
+        return False
+
+    def __add(self, key, obj):
+        """stores obj under key and marks it as changed; an object already
+        stored only gets its lists and dictionaries marked, which may have
+        changed in place without going through __setattr__"""
+        if self.__objects.get(key) is not obj:
+            self.__put(key, obj)
+            self.__touch(key)
+            return
+        for attr, value in obj.to_dict().items():
+            if type(value) is list or type(value) is dict:
+                self.__touch(key, attr)
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
             key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            with self.__lock:
+                self.__add(key, obj)
+
+    def bulk_new(self, objs):
+        """sets in __objects every object of objs, taking the lock once"""
+        with self.__lock:
+            for obj in objs:
+                self.__add(obj.__class__.__name__ + "." + obj.id, obj)
 
     def save(self):
         """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
+        with self.__lock:
+            self.__save()
+
+    def bulk_save(self, objs, batch_size=None):
+        """adds every object of objs and writes them all with a single
+        save(); batch_size is only used by DBStorage"""
+        with self.__lock:
+            self.bulk_new(objs)
+            self.__save()
+
+    def __save(self):
+        """writes the changes to the shards, the journal or the file"""
+        FileStorage.__serialized = 0
+        FileStorage.__written = 0
+        if self.__shard_dir:
+            dirty = {key.partition(".")[0]
+                     for key in list(self.__pending) + list(self.__deleted)}
+            self.__ensure(dirty)
+            for cls_name in dirty:
+                self.__write_shard(cls_name)
+            self.__pending.clear()
+            self.__deleted.clear()
+            return
+        if not self.__journal:
+            self.__compact()
+            return
+        with self.__open_journal() as journal:
+            if os.path.exists(self.__file_path):
+                self.__append_journal(journal)
+                if os.fstat(journal.fileno()).st_size <= \
+                   self.__journal_limit:
+                    return
+            # the records other processes appended since the last replay
+            # go into the new file too
+            if self.__file_changed():
+                self.__reload_file()
+            else:
+                self.__replay_journal()
+            self.__compact()
+
+    def __journal_path(self):
+        """returns the path of the journal kept next to __file_path"""
+        return self.__file_path + ".log"
+
+    def __open_journal(self):
+        """opens the journal for appending and takes its exclusive lock,
+        held until it is closed; every process appending to the journal
+        or compacting it takes that lock. The journal is opened again if
+        a compaction removed it while waiting for the lock"""
+        while True:
+            f = open(self.__journal_path(), 'ab')
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(self.__journal_path()).st_ino == \
+                   os.fstat(f.fileno()).st_ino:
+                    return f
+            except OSError:
+                pass
+            f.close()
+
+    def __append_journal(self, journal):
+        """appends to journal, the journal opened by __open_journal(), one
+        record per object changed since the last save:
+        [key, dictionary] for a new object, [key, fields, "update"] with
+        only the attributes that changed for an updated one, and
+        [key, null] for a deleted one"""
+        lines = [b"[" + json.dumps(key).encode() + b", null]\n"
+                 for key in self.__deleted]
+        for key, fields in self.__pending.items():
+            if self.__stored(key) is None:
+                continue
+            if fields is None or key not in self.__objects:
+                value = self.__fragment(key)
+            elif not fields:
+                continue
+            else:
+                value = self.__objects[key].to_json(fields=fields) + \
+                    b', "update"'
+            lines.append(b"[" + json.dumps(key).encode() + b", " + value +
+                         b"]\n")
+        FileStorage.__written = len(lines)
+        self.__pending.clear()
+        self.__deleted.clear()
+        if not lines:
+            return
+        data = b"".join(lines)
+        st = os.fstat(journal.fileno())
+        journal.write(data)
+        journal.flush()
+        # skip our own records on the next close() unless another process
+        # appended records we have not replayed yet
+        if st.st_size == self.__journal_offset and \
+           (st.st_ino == self.__journal_ino or st.st_size == 0):
+            FileStorage.__journal_ino = st.st_ino
+            FileStorage.__journal_offset = st.st_size + len(data)
+
+    def __compact(self):
+        """writes every object to a fresh JSON file and drops the journal;
+        with the journal, its lock must be held"""
+        if self.__binary:
+            self.__write_snapshot()
+        else:
+            keys = list(self.__objects) + list(self.__raw)
+            FileStorage.__file_stamp = self.__dump(self.__file_path, keys)
+        self.__pending.clear()
+        self.__deleted.clear()
+        if os.path.exists(self.__journal_path()):
+            os.remove(self.__journal_path())
+        FileStorage.__journal_ino = None
+        FileStorage.__journal_offset = 0
+
+    def __fragment(self, key):
+        """returns the JSON bytes of the dictionary of the object or raw
+        record stored under key, serializing it only if it changed since
+        it was last serialized"""
+        fragment = self.__fragments.get(key)
+        if type(fragment) is not bytes:
+            value = self.__stored(key)
+            if type(value) is int or type(value) is dict:
+                fragment = json.dumps(self.__record(key, value)).encode()
+            else:
+                fragment = value.to_json()
+            self.__fragments[key] = fragment
+            FileStorage.__serialized += 1
+        return fragment
+
+    def __dump(self, path, keys):
+        """writes the objects stored under keys as a JSON object to a
+        temporary file moved over path, and returns the stamp of the new
+        file"""
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        fragments = [json.dumps(key).encode() + b": " + self.__fragment(key)
+                     for key in keys]
+        FileStorage.__written += len(fragments)
+        with open(tmp_path, 'wb') as f:
+            f.write(b"{" + b", ".join(fragments) + b"}")
+            f.flush()
+            stamp = self.__stamp(os.fstat(f.fileno()))
+        os.replace(tmp_path, path)
+        return stamp
+
+    def __write_snapshot(self):
+        """writes every object to a fresh binary snapshot, copying the
+        records of the objects that did not change as they are"""
+        self.__list(classes)
+        records = {}
+        for key in list(self.__objects) + list(self.__raw):
+            value = self.__stored(key)
+            offset = value if type(value) is int else self.__fragments.get(key)
+            if type(offset) is int:
+                records[key] = self.__snapshot.raw_record(offset)
+            else:
+                if type(value) is not dict:
+                    value = value.to_dict()
+                records[key] = snapshot.encode(value)
+                FileStorage.__serialized += 1
+        offsets, stat = snapshot.write(self.__file_path, records)
+        FileStorage.__written = len(records)
+        self.__set_snapshot(snapshot.Snapshot(self.__file_path))
+        FileStorage.__file_stamp = self.__stamp(stat)
+        for key, value in self.__raw.items():
+            if type(value) is int:
+                self.__raw[key] = offsets[key]
+            else:
+                self.__fragments[key] = offsets[key]
         for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+            self.__fragments[key] = offsets[key]
+        FileStorage.__listed = set(classes)
+        FileStorage.__dropped = set()
 
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+    def __set_snapshot(self, snap):
+        """replaces __snapshot with snap. The old snapshot is not closed,
+        threads may still read it; old keeps it alive until the class
+        attribute is set, as freeing it unmaps its file and lets other
+        threads run, which must not find it in the class any more"""
+        old = FileStorage.__snapshot
+        FileStorage.__snapshot = snap
+
+    def __read_snapshot(self):
+        """maps the binary snapshot without reading its index: its records
+        are added to __raw when their class is first listed, or one at a
+        time when they are looked up. The records stored here that it
+        replaces are dropped, and all of them when it replaces a snapshot
+        or a file read before (objects with unsaved changes are kept)"""
+        refresh = self.__file_stamp is not None
+        try:
+            self.__set_snapshot(snapshot.Snapshot(self.__file_path))
+            FileStorage.__file_stamp = self.__stamp(self.__snapshot.stat)
+        except (OSError, ValueError):
+            self.__set_snapshot(None)
+            FileStorage.__file_stamp = None
+        FileStorage.__listed = set()
+        FileStorage.__dropped = set()
+        FileStorage.__fk_deferred = set()
+        for key in list(self.__objects) + list(self.__raw):
+            if not self.__unsaved(key) and \
+               (refresh or self.__snapshot_offset(key) is not None):
+                self.__remove(key)
+
+    def __snapshot_offset(self, key):
+        """returns the offset of the record of key in the snapshot, None if
+        it has none"""
+        if self.__snapshot is None:
+            return None
+        return self.__snapshot.offset(key)
+
+    def __list(self, cls_names):
+        """makes sure every key of the classes cls_names is in
+        __class_index: loads their shards, or adds the keys of the snapshot
+        not stored nor dropped here yet"""
+        self.__ensure(cls_names)
+        if self.__snapshot is None:
+            return
+        for cls_name in cls_names:
+            if cls_name in self.__listed:
+                continue
+            with self.__lock:
+                if cls_name in self.__listed or self.__snapshot is None:
+                    continue
+                for key, offset in self.__snapshot.entries(cls_name):
+                    if key not in self.__objects and key not in self.__raw \
+                       and key not in self.__dropped:
+                        self.__put_raw(key, offset)
+                self.__fk_deferred.add(cls_name)
+                self.__listed.add(cls_name)
+
+    def __from_snapshot(self, key):
+        """adds the snapshot record of key to __raw if its class is not
+        listed yet, so that looking it up does not list the class"""
+        if self.__snapshot is None or \
+           key.partition(".")[0] in self.__listed or \
+           key in self.__objects or key in self.__raw:
+            return
+        with self.__lock:
+            if key.partition(".")[0] in self.__listed or \
+               key in self.__objects or key in self.__raw or \
+               key in self.__dropped:
+                return
+            offset = self.__snapshot_offset(key)
+            if offset is not None:
+                self.__put_raw(key, offset)
+
+    def __drop(self, key):
+        """removes the object or raw record stored under key, and keeps it
+        from coming back from the snapshot"""
+        self.__from_snapshot(key)
+        self.__remove(key)
+        if self.__snapshot_offset(key) is not None:
+            self.__dropped.add(key)
+
+    def __index_deferred(self, cls_name):
+        """adds the objects of cls_name to the foreign key index, decoding
+        the snapshot records that were only indexed by class"""
+        if cls_name not in self.__fk_deferred:
+            return
+        with self.__lock:
+            if cls_name not in self.__fk_deferred:
+                return
+            for key in list(self.__class_index.get(cls_name, ())):
+                obj = self.__stored(key)
+                if type(obj) is int:
+                    self.__put_raw(key, self.__record(key, obj))
+                elif obj is not None:
+                    self.__index(key, obj)
+            self.__fk_deferred.discard(cls_name)
+
+    def __read(self, path):
+        """returns the stamp and the JSON content of path, or None and an
+        empty dictionary if it cannot be read"""
+        try:
+            with open(path, 'r') as f:
+                stamp = self.__stamp(os.fstat(f.fileno()))
+                return stamp, json.load(f)
+        except (OSError, ValueError):
+            return None, {}
+
+    def __shard_path(self, cls_name):
+        """returns the path of the shard file of the class cls_name"""
+        return os.path.join(self.__shard_dir, shard_files[cls_name])
+
+    def __ensure(self, cls_names):
+        """loads the shards of cls_names that were not loaded yet"""
+        if self.__shard_dir:
+            missing = [cls_name for cls_name in cls_names
+                       if cls_name in shard_files and
+                       cls_name not in self.__loaded]
+            if missing:
+                with self.__lock:
+                    self.__load_shards([cls_name for cls_name in missing
+                                        if cls_name not in self.__loaded])
+
+    def __load_shards(self, cls_names):
+        """reads the shards of cls_names one after the other, and replaces
+        the records of those classes with their content (objects with
+        unsaved changes are kept)"""
+        for cls_name in cls_names:
+            stamp, records = self.__read(self.__shard_path(cls_name))
+            stale = list(self.__class_index.get(cls_name, ()))
+            for key, value in records.items():
+                if not self.__unsaved(key):
+                    self.__put_raw(key, value)
+            for key in stale:
+                if key not in records and key not in self.__pending:
+                    self.__remove(key)
+            self.__loaded[cls_name] = stamp
+
+    def __write_shard(self, cls_name):
+        """writes every object of the class cls_name to its shard"""
+        os.makedirs(self.__shard_dir, exist_ok=True)
+        self.__loaded[cls_name] = self.__dump(
+            self.__shard_path(cls_name),
+            list(self.__class_index.get(cls_name, ())))
+
+    def __shard_changed(self, cls_name):
+        """tells if the shard of cls_name changed since it was last read"""
+        try:
+            stamp = self.__stamp(os.stat(self.__shard_path(cls_name)))
+        except OSError:
+            stamp = None
+        return stamp != self.__loaded[cls_name]
+
+    def __stamp(self, st):
+        """returns the (inode, size, mtime) stamp of an os.stat result"""
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def __file_changed(self):
+        """tells if __file_path changed since this process last read it"""
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
+            stamp = self.__stamp(os.stat(self.__file_path))
+        except OSError:
+            stamp = None
+        return stamp != self.__file_stamp
+
+    def __journal_changed(self):
+        """tells if records were appended to the journal since the last
+        replay"""
+        try:
+            st = os.stat(self.__journal_path())
+        except OSError:
+            return False
+        return (st.st_ino, st.st_size) != (self.__journal_ino,
+                                           self.__journal_offset)
+
+    def __replay_journal(self, on_disk=None):
+        """applies the journal records appended since the last replay, and
+        adds the keys they leave on disk to the set on_disk if given"""
+        try:
+            st = os.stat(self.__journal_path())
+        except OSError:
+            return
+        offset = self.__journal_offset
+        if st.st_ino != self.__journal_ino or st.st_size < offset:
+            offset = 0
+        elif st.st_size == offset:
+            return
+        with open(self.__journal_path(), 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # a partially written last record is left for the next replay
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                key, value, *update = json.loads(line.decode())
+                self.__from_snapshot(key)
+                if self.__unsaved(key):
+                    # the next save writes the local version over it
+                    if on_disk is not None:
+                        on_disk.add(key)
+                    continue
+                if update:
+                    stored = self.__stored(key)
+                    if stored is None:
+                        continue
+                    if type(stored) is int or type(stored) is dict:
+                        value = dict(self.__record(key, stored), **value)
+                    else:
+                        value = dict(stored.to_dict(), **value)
+                if value is None:
+                    self.__drop(key)
+                    if on_disk is not None:
+                        on_disk.discard(key)
+                else:
+                    self.__put_raw(key, value)
+                    if on_disk is not None:
+                        on_disk.add(key)
+            except:
+                pass
+        FileStorage.__journal_ino = st.st_ino
+        FileStorage.__journal_offset = offset + end
+
+    def reload(self):
+        """deserializes the JSON file to __objects, then replays the
+        journal on top of it
+
+        With one file per class, shards are only read when their class is
+        first used: reload() reads the shards already loaded again, and
+        splits __file_path into shards if there are none yet."""
+        with self.__lock:
+            self.__reload()
+
+    def __reload(self):
+        """reads the shards or the file, see reload()"""
+        if not self.__shard_dir:
+            self.__reload_file()
+        elif any(os.path.exists(self.__shard_path(cls_name))
+                 for cls_name in shard_files):
+            self.__load_shards(list(self.__loaded))
+        else:
+            self.__reload_file()
+            for cls_name in shard_files:
+                self.__write_shard(cls_name)
+
+    def __reload_file(self):
+        """deserializes __file_path and its journal to __objects"""
+        refresh = self.__file_stamp is not None
+        if self.__binary:
+            self.__read_snapshot()
+            on_disk = None
+        else:
+            FileStorage.__file_stamp, jo = self.__read(self.__file_path)
+            on_disk = set(jo)
             for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except:
-            pass
+                if not self.__unsaved(key):
+                    self.__put_raw(key, jo[key])
+        FileStorage.__journal_ino = None
+        FileStorage.__journal_offset = 0
+        self.__replay_journal(on_disk)
+        if refresh and on_disk is not None:
+            # objects another process removed from the file, unless they
+            # were changed here and not saved yet
+            for key in list(self.__objects) + list(self.__raw):
+                if key not in on_disk and key not in self.__pending:
+                    self.__remove(key)
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            self.__ensure([obj.__class__.__name__])
+            self.__from_snapshot(key)
+            with self.__lock:
+                if self.__stored(key) is not None:
+                    self.__drop(key)
+                    self.__pending.pop(key, None)
+                    self.__deleted.add(key)
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
-        self.reload()
+        """reloads the objects if the JSON file changed since it was last
+        read, or replays only the new journal records if it did not"""
+        if self.__shard_dir:
+            changed = [cls_name for cls_name in list(self.__loaded)
+                       if self.__shard_changed(cls_name)]
+            if changed:
+                with self.__lock:
+                    self.__load_shards(changed)
+        elif self.__file_changed():
+            self.reload()
+        elif self.__journal_changed():
+            with self.__lock:
+                self.__replay_journal()
 
-    def get(self, cls, id):
+    def use_replicas(self):
+        """does nothing, file storage has no read replicas"""
+
+    def get(self, cls, id, prefetch=None):
         """retrieve one object"""
-        return self.all(cls).get("{}.{}".format(cls.__name__, id))
+        if id is None:
+            return None
+        key = "{}.{}".format(self.__class_name(cls), id)
+        self.__ensure([self.__class_name(cls)])
+        self.__from_snapshot(key)
+        return self.__lookup(key)
+
+    def get_many(self, cls, ids, prefetch=None):
+        """retrieve the objects of a list of ids, in the order of the list;
+        ids without an object are skipped"""
+        objs = []
+        for id in dict.fromkeys(id for id in ids if id is not None):
+            obj = self.get(cls, id)
+            if obj is not None:
+                objs.append(obj)
+        return objs
 
     def count(self, cls=None):
         """count number of objects in storage"""
-        return len(self.all(cls))
+        if cls is not None:
+            cls_name = self.__class_name(cls)
+            self.__ensure([cls_name])
+            keys = tuple(self.__class_index.get(cls_name, ()))
+            snap = self.__snapshot
+            if snap is None or cls_name in self.__listed:
+                return len(keys)
+            # the snapshot counts the records of the class not used yet,
+            # plus the keys added and deleted here
+            added = sum(1 for key in keys if snap.offset(key) is None)
+            dropped = sum(1 for key in tuple(self.__dropped)
+                          if key.partition(".")[0] == cls_name)
+            return snap.count(cls_name) + added - dropped
+        self.__ensure(shard_files)
+        if self.__snapshot is not None:
+            return sum(self.count(cls_name) for cls_name in classes)
+        return len(self.__objects) + len(self.__raw)
+
+    def counts(self, clss=None):
+        """count the objects of each class of clss, all classes by default;
+        returns the counts by class name"""
+        if clss is None:
+            clss = classes.values()
+        return {self.__class_name(cls): self.count(cls) for cls in clss}
+
+    def save_stats(self):
+        """returns how many objects the last save() wrote, and how many of
+        them it had to serialize again because they changed"""
+        return {"written": self.__written, "serialized": self.__serialized}
+
+    def changed_fields(self, obj):
+        """returns the set of the names of the attributes of obj that
+        changed since it was last saved; all of them for an object that
+        was never saved, none for an object that is not stored"""
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", None))
+        if self.__objects.get(key) is not obj or key not in self.__pending:
+            return set()
+        fields = self.__pending[key]
+        if fields is None:
+            return set(obj.to_dict()) - {"__class__"}
+        return set(fields)
+
+    def related(self, cls, attr, id):
+        """returns the list of cls objects whose foreign key attr is id"""
+        fk = "{}.{}".format(self.__class_name(cls), attr)
+        self.__list([self.__class_name(cls)])
+        self.__index_deferred(self.__class_name(cls))
+        related = []
+        for key in tuple(self.__fk_index.get(fk, {}).get(id, ())):
+            obj = self.__lookup(key)
+            if obj is not None:
+                related.append(obj)
+        return related
+
+    def changed(self, obj, attr, old):
+        """records that attr of a stored obj changed from old to its current
+        value, and moves obj between foreign key buckets if needed"""
+        cls_name = obj.__class__.__name__
+        key = "{}.{}".format(cls_name, getattr(obj, "id", None))
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock:
+            # a property setter may change any other attribute
+            if type(getattr(type(obj), attr, None)) is property:
+                self.__touch(key)
+            else:
+                self.__touch(key, attr)
+            if attr not in foreign_keys.get(cls_name, ()):
+                return
+            fk = cls_name + "." + attr
+            parent_id = getattr(obj, attr, None)
+            if parent_id:
+                self.__fk_index.setdefault(fk, {}).setdefault(
+                    parent_id, {})[key] = None
+            self.__unindex_fk(key, fk, old)
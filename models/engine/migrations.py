@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+"""
+Contains the versioned migrations of the database schema
+"""
+
+from datetime import datetime
+import models
+from models.base_model import Base
+from sqlalchemy import Column, DateTime, Integer, String, Table
+from sqlalchemy import func, inspect, select
+from sqlalchemy.exc import DatabaseError, IntegrityError, OperationalError
+
+if models.storage_t == "db":
+    schema_migrations = Table(
+        "schema_migrations", Base.metadata,
+        Column("version", Integer, primary_key=True, autoincrement=False),
+        Column("name", String(128), nullable=False),
+        Column("applied_at", DateTime, nullable=False))
+
+
+def create_tables(connection):
+    """creates the tables of the models missing from the database"""
+    Base.metadata.create_all(connection)
+
+
+def create_indexes(connection):
+    """creates the indexes of the models missing from the database, for
+    databases created before the models declared them"""
+    for index in missing_indexes(connection):
+        index.create(connection)
+
+
+# (version, name, upgrade) of each migration, in the order they apply;
+# a migration may run again after a crash, so it must be idempotent
+migrations = [
+    (1, "create the tables", create_tables),
+    (2, "index the foreign keys and the lookup columns", create_indexes),
+]
+
+
+def schema_version(engine):
+    """returns the version of the last migration applied to the database,
+    0 when none was; a single query, without introspecting the schema"""
+    try:
+        with engine.connect() as connection:
+            version = connection.execute(
+                select(func.max(schema_migrations.c.version))).scalar()
+    except DatabaseError:
+        # no schema_migrations table yet
+        return 0
+    return version or 0
+
+
+def migrate(engine, target=None):
+    """upgrades the database in place by applying the migrations above its
+    version, up to target or the last one; returns the versions applied
+
+    When the database is already at target, this costs the one query of
+    schema_version(), with no DDL nor introspection."""
+    if target is None:
+        target = migrations[-1][0]
+    current = schema_version(engine)
+    if current >= target:
+        return []
+    schema_migrations.create(engine, checkfirst=True)
+    applied = []
+    for version, name, upgrade in migrations:
+        if version <= current or version > target:
+            continue
+        if apply_migration(engine, version, name, upgrade):
+            applied.append(version)
+    return applied
+
+
+def apply_migration(engine, version, name, upgrade, attempts=3):
+    """runs upgrade and records version in one transaction; returns False
+    when another process applied version first"""
+    for attempt in range(attempts):
+        try:
+            with engine.begin() as connection:
+                upgrade(connection)
+                connection.execute(schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()))
+            return True
+        except IntegrityError:
+            # another process recorded this version first
+            return False
+        except OperationalError:
+            # another process created a table or an index of this version
+            # between the check of upgrade and its CREATE; upgrades are
+            # idempotent, so run it again unless that process recorded it
+            if schema_version(engine) >= version:
+                return False
+            if attempt == attempts - 1:
+                raise
+
+
+def reset(engine):
+    """empties the database: deletes the rows of the tables when the schema
+    is at the last version, instead of dropping them to migrate again"""
+    if schema_version(engine) < migrations[-1][0]:
+        Base.metadata.drop_all(engine)
+        return
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table is not schema_migrations:
+                connection.execute(table.delete())
+
+
+def missing_indexes(bind):
+    """returns the indexes declared by the models that the tables of the
+    database lack; an index on the same columns, whatever its name,
+    counts as present"""
+    inspector = inspect(bind)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        present = {tuple(index["column_names"])
+                   for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if tuple(column.name for column in index.columns) not in present:
+                missing.append(index)
+    return missing
@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+"""
+Contains the Snapshot class and the converters between the JSON file and
+the binary snapshot format
+
+A snapshot is laid out as:
+    header   b"HBNB" and a format version byte
+    records  for each object, its length as an unsigned 32 bits integer
+             followed by its dictionary as compact JSON, without the
+             "__class__" and "id" keys that are part of <class name>.id
+    index    for each <class name>.id key in sorted order, its length as
+             an unsigned 16 bits integer, the key and the offset of its
+             record as an unsigned 64 bits integer
+    slots    the offset of each index entry, to binary search the index
+    footer   offsets of the index and of the slots, number of records and
+             b"HBNB"
+"""
+
+from bisect import bisect_left
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"HBNB"
+VERSION = 1
+HEADER = struct.Struct("<4sB")
+RECORD = struct.Struct("<I")
+KEY = struct.Struct("<H")
+OFFSET = struct.Struct("<Q")
+FOOTER = struct.Struct("<QQQ4s")
+
+
+class Snapshot:
+    """read-only, memory-mapped view of a binary snapshot file"""
+
+    def __init__(self, path):
+        """maps the snapshot file at path and checks its header"""
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            if self.stat.st_size < HEADER.size + FOOTER.size:
+                raise ValueError("{} is not a snapshot".format(path))
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self.__map, 0)
+        (self.__index, self.__slots, self.__count,
+         end) = FOOTER.unpack_from(self.__map, len(self.__map) - FOOTER.size)
+        if magic != MAGIC or end != MAGIC or version != VERSION:
+            raise ValueError("{} is not a snapshot".format(path))
+
+    def __len__(self):
+        """returns the number of records of the snapshot"""
+        return self.__count
+
+    def __entry(self, position):
+        """returns the key and record offset of the index entry at
+        position"""
+        key_len, = KEY.unpack_from(self.__map, position)
+        position += KEY.size
+        key = self.__map[position:position + key_len].decode()
+        offset, = OFFSET.unpack_from(self.__map, position + key_len)
+        return key, offset
+
+    def __key(self, i):
+        """returns the key and record offset of the i-th index entry"""
+        position, = OFFSET.unpack_from(self.__map,
+                                       self.__slots + i * OFFSET.size)
+        return self.__entry(position)
+
+    def entries(self, cls_name=None):
+        """yields the (key, record offset) pairs in key order, only those of
+        the class cls_name if given"""
+        if cls_name is not None:
+            for i in range(self.__find(cls_name + "."),
+                           self.__find(cls_name + "/")):
+                yield self.__key(i)
+            return
+        position = self.__index
+        for i in range(self.__count):
+            key, offset = self.__entry(position)
+            yield key, offset
+            position += KEY.size + len(key.encode()) + OFFSET.size
+
+    def raw_record(self, offset):
+        """returns the encoded record stored at offset"""
+        length, = RECORD.unpack_from(self.__map, offset)
+        start = offset + RECORD.size
+        return self.__map[start:start + length]
+
+    def record(self, offset, key):
+        """returns the dictionary of the object key stored at offset"""
+        value = json.loads(self.raw_record(offset).decode())
+        value["__class__"], _, value["id"] = key.partition(".")
+        return value
+
+    def __find(self, key):
+        """returns the position of key in the sorted index"""
+        keys = _KeyView(self)
+        return bisect_left(keys, key)
+
+    def offset(self, key):
+        """returns the record offset of the object key, None if missing"""
+        i = self.__find(key)
+        if i < self.__count:
+            found, offset = self.__key(i)
+            if found == key:
+                return offset
+        return None
+
+    def get(self, key):
+        """returns the dictionary of the object key, None if missing"""
+        offset = self.offset(key)
+        if offset is None:
+            return None
+        return self.record(offset, key)
+
+    def count(self, cls_name=None):
+        """returns the number of records, of the class cls_name if given"""
+        if cls_name is None:
+            return self.__count
+        return self.__find(cls_name + "/") - self.__find(cls_name + ".")
+
+    def close(self):
+        """unmaps the snapshot file"""
+        self.__map.close()
+
+    def key_at(self, i):
+        """returns the i-th key of the sorted index"""
+        return self.__key(i)[0]
+
+
+class _KeyView:
+    """sequence of the sorted keys of a snapshot, for bisect"""
+
+    def __init__(self, snapshot):
+        """wraps snapshot"""
+        self.snapshot = snapshot
+
+    def __len__(self):
+        """returns the number of keys"""
+        return len(self.snapshot)
+
+    def __getitem__(self, i):
+        """returns the i-th key"""
+        return self.snapshot.key_at(i)
+
+
+def encode(value):
+    """returns the record of a dictionary returned by to_dict()"""
+    value = {k: v for k, v in value.items() if k not in ("__class__", "id")}
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def write(path, records):
+    """writes records, a dictionary of encoded records by <class name>.id,
+    to a temporary file moved over path; returns the offsets of the
+    records by key and the os.stat result of the new file"""
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    offsets = {}
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION))
+        position = HEADER.size
+        keys = sorted(records)
+        for key in keys:
+            data = records[key]
+            offsets[key] = position
+            f.write(RECORD.pack(len(data)))
+            f.write(data)
+            position += RECORD.size + len(data)
+        index = position
+        slots = []
+        for key in keys:
+            encoded = key.encode()
+            slots.append(position)
+            f.write(KEY.pack(len(encoded)) + encoded +
+                    OFFSET.pack(offsets[key]))
+            position += KEY.size + len(encoded) + OFFSET.size
+        f.write(b"".join(OFFSET.pack(slot) for slot in slots))
+        f.write(FOOTER.pack(index, position, len(keys), MAGIC))
+        f.flush()
+        stat = os.fstat(f.fileno())
+    os.replace(tmp_path, path)
+    return offsets, stat
+
+
+def json_to_snapshot(json_path, snapshot_path):
+    """converts the JSON file at json_path to a snapshot"""
+    with open(json_path, 'r') as f:
+        objects = json.load(f)
+    write(snapshot_path, {key: encode(value)
+                          for key, value in objects.items()})
+
+
+def snapshot_to_json(snapshot_path, json_path):
+    """converts the snapshot at snapshot_path to a JSON file"""
+    snapshot = Snapshot(snapshot_path)
+    objects = {key: snapshot.record(offset, key)
+               for key, offset in snapshot.entries()}
+    snapshot.close()
+    with open(json_path, 'w') as f:
+        json.dump(objects, f)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source> <destination>".format(sys.argv[0]))
+        print("converts file.json to a snapshot if source ends with .json,"
+              " or a snapshot to file.json otherwise")
+        sys.exit(1)
+    if sys.argv[1].endswith(".json"):
+        json_to_snapshot(sys.argv[1], sys.argv[2])
+    else:
+        snapshot_to_json(sys.argv[1], sys.argv[2])
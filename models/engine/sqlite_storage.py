@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from models.engine.db_storage import DBStorage, MonitoredQueuePool
+from os import getenv
+from sqlalchemy import create_engine, event
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """sets up every new SQLite connection: write-ahead logging so that
+    readers do not block the writer, and foreign keys enforced like
+    MySQL does"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def sqlite_engine(path):
+    """returns an engine on the SQLite database file path"""
+    engine = create_engine('sqlite:///{}'.format(path),
+                           connect_args={"check_same_thread": False},
+                           poolclass=MonitoredQueuePool)
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+class SQLiteStorage(DBStorage):
+    """interacts with a SQLite database file through the same SQLAlchemy
+    models as DBStorage"""
+
+    def __init__(self, path=None, replicas=None, cache_size=None):
+        """Instantiate a SQLiteStorage object on the database file path,
+        HBNB_SQLITE_PATH or hbnb.db by default; replicas is a list of
+        paths of read replicas, the comma separated paths of
+        HBNB_SQLITE_REPLICAS by default, and cache_size is passed to
+        DBStorage"""
+        if path is None:
+            path = getenv('HBNB_SQLITE_PATH', 'hbnb.db')
+        if replicas is None and getenv('HBNB_SQLITE_REPLICAS'):
+            replicas = getenv('HBNB_SQLITE_REPLICAS').split(',')
+        super().__init__(sqlite_engine(path),
+                         [sqlite_engine(replica.strip())
+                          for replica in replicas or ()], cache_size)
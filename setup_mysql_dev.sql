@@ -1,4 +1,6 @@
 -- prepares a MySQL server for the project
+-- the tables and indexes are created, and upgraded in place, by the
+-- migrations of models/engine/migrations.py when the storage reloads
 
 CREATE DATABASE IF NOT EXISTS hbnb_dev_db;
 CREATE USER IF NOT EXISTS 'hbnb_dev'@'localhost' IDENTIFIED BY 'hbnb_dev_pwd';
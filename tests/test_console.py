@@ -1,12 +1,19 @@
 #!/usr/bin/python3
 """
-Contains the class TestConsoleDocs
+Contains the classes TestConsoleDocs and TestConsoleImport
 """
 
 import console
 import inspect
+from io import StringIO
+import json
+import models
+from models.state import State
+import os
 import pep8
+import tempfile
 import unittest
+from unittest import mock
 HBNBCommand = console.HBNBCommand
 
 
@@ -39,3 +46,60 @@ class TestConsoleDocs(unittest.TestCase):
                          "HBNBCommand class needs a docstring")
         self.assertTrue(len(HBNBCommand.__doc__) >= 1,
                         "HBNBCommand class needs a docstring")
+
+
+class TestConsoleImport(unittest.TestCase):
+    """Class for testing the import command of the console"""
+    def run_import(self, arg):
+        """runs the import command and returns its output"""
+        with mock.patch('sys.stdout', new=StringIO()) as output:
+            HBNBCommand().onecmd("import " + arg)
+        return output.getvalue()
+
+    def test_import(self):
+        """Test that import saves the objects of a JSON file"""
+        states = [State(name="Amazonas"), State(name="Vaupes")]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "states.json")
+            with open(path, "w") as f:
+                json.dump([state.to_dict() for state in states], f)
+            count = models.storage.count(State)
+            self.assertEqual(self.run_import(path), "2\n")
+            self.assertEqual(models.storage.count(State), count + 2)
+            for state in states:
+                imported = models.storage.get(State, state.id)
+                self.assertEqual(imported.name, state.name)
+                models.storage.delete(imported)
+            models.storage.save()
+
+    def test_import_errors(self):
+        """Test the error messages of import"""
+        self.assertEqual(self.run_import(""), "** file name missing **\n")
+        self.assertEqual(self.run_import("/nowhere/file.json"),
+                         "** file can't be read **\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "objects.json")
+            with open(path, "w") as f:
+                json.dump([{"__class__": "Nowhere"}], f)
+            self.assertEqual(self.run_import(path),
+                             "** class doesn't exist **\n")
+
+
+class TestConsoleCommands(unittest.TestCase):
+    """Class for testing the commands that look up an instance"""
+    def run_command(self, line):
+        """runs a console command and returns its output"""
+        with mock.patch('sys.stdout', new=StringIO()) as output:
+            HBNBCommand().onecmd(line)
+        return output.getvalue()
+
+    def test_missing_instance(self):
+        """Test that show, destroy and update report a missing instance of
+        every class, BaseModel included"""
+        for name in ["BaseModel", "State"]:
+            for command in ["show", "destroy", "update"]:
+                with self.subTest(name=name, command=command):
+                    self.assertEqual(
+                        self.run_command("{} {} Nowhere name x".format(
+                            command, name)),
+                        "** no instance found **\n")
@@ -2,11 +2,16 @@
 """Test BaseModel for expected behavior and documentation"""
 from datetime import datetime
 import inspect
+import json
 import models
+import os
 import pep8 as pycodestyle
+import subprocess
+import sys
 import time
 import unittest
 from unittest import mock
+import uuid
 BaseModel = models.base_model.BaseModel
 module_doc = models.base_model.__doc__
 
@@ -144,6 +149,52 @@ class TestBaseModel(unittest.TestCase):
         string = "[BaseModel] ({}) {}".format(inst.id, inst.__dict__)
         self.assertEqual(string, str(inst))
 
+    def test_to_json(self):
+        """Test that to_json returns the JSON bytes of to_dict"""
+        inst = BaseModel()
+        inst.name = "Holberton"
+        self.assertEqual(json.loads(inst.to_json()), inst.to_dict())
+        self.assertEqual(json.loads(inst.to_json(sort_keys=True)),
+                         inst.to_dict())
+        self.assertEqual(list(json.loads(inst.to_json(sort_keys=True))),
+                         sorted(inst.to_dict()))
+
+    def test_format_time(self):
+        """Test that timestamps are formatted like strftime does, with or
+        without microseconds"""
+        inst = BaseModel()
+        t_format = "%Y-%m-%dT%H:%M:%S.%f"
+        inst.updated_at = datetime(2017, 9, 28, 21, 3, 54)
+        self.assertEqual(inst.to_dict()["updated_at"],
+                         inst.updated_at.strftime(t_format))
+        inst.updated_at = datetime(2017, 9, 28, 21, 3, 54, 52298)
+        self.assertEqual(inst.to_dict()["updated_at"],
+                         "2017-09-28T21:03:54.052298")
+
+    @unittest.skipIf(models.storage_t == 'db', "loaders are for files")
+    def test_loader(self):
+        """Test that a loader builds the objects its class would"""
+        inst = BaseModel()
+        inst.name = "Holberton"
+        value = inst.to_dict()
+        loaded = models.base_model.loader(BaseModel).load([dict(value)])[0]
+        self.assertIs(type(loaded), BaseModel)
+        self.assertEqual(loaded.to_dict(), value)
+        self.assertEqual(loaded.created_at, inst.created_at)
+        self.assertIs(type(loaded.updated_at), datetime)
+        new = models.base_model.loader(BaseModel).load([{}])[0]
+        self.assertIs(type(new.id), str)
+        self.assertIs(type(new.created_at), datetime)
+
+    def test_uuid7(self):
+        """Test that uuid7 ids are version 7 UUIDs in creation order"""
+        ids = [models.base_model.uuid7() for i in range(5000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        for value in ids[:10]:
+            self.assertEqual(uuid.UUID(value).version, 7)
+            self.assertEqual(len(value), len(BaseModel().id))
+
     @mock.patch('models.storage')
     def test_save(self, mock_storage):
         """Test that save method updates `updated_at` and calls
@@ -158,3 +209,48 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.new.called)
         self.assertTrue(mock_storage.save.called)
+
+
+@unittest.skipIf(models.storage_t == 'db', "compact models are for files")
+class TestCompactModels(unittest.TestCase):
+    """Test the models with HBNB_COMPACT_MODELS=1, in a new process since
+    the setting is read when the models are imported"""
+    script = """if True:
+        import json
+        from models.base_model import loader
+        from models.place import Place
+        place = Place(name="Loft", number_rooms=2, color="blue")
+        place.price_by_night = 80
+        copy = Place(**place.to_dict())
+        loaded = loader(Place).load([place.to_dict()])[0]
+        print(json.dumps({"has_dict": hasattr(place, "__dict__"),
+                          "to_dict": place.to_dict(), "str": str(place),
+                          "description": place.description,
+                          "color": place.color,
+                          "copy": copy.to_dict() == place.to_dict(),
+                          "loaded": loaded.to_dict() == place.to_dict()}))
+        """
+
+    def test_compact_place(self):
+        """Test that compact objects have no __dict__ but keep their
+        defaults, extra attributes, to_dict and __str__"""
+        env = dict(os.environ, HBNB_COMPACT_MODELS="1")
+        out = subprocess.run([sys.executable, "-c", self.script], env=env,
+                             stdout=subprocess.PIPE, check=True).stdout
+        result = json.loads(out)
+        self.assertFalse(result["has_dict"])
+        self.assertEqual(result["description"], "")
+        self.assertEqual(result["color"], "blue")
+        self.assertTrue(result["copy"])
+        self.assertTrue(result["loaded"])
+        place = result["to_dict"]
+        self.assertEqual(place["__class__"], "Place")
+        self.assertEqual(place["name"], "Loft")
+        self.assertEqual(place["number_rooms"], 2)
+        self.assertEqual(place["price_by_night"], 80)
+        self.assertEqual(place["color"], "blue")
+        self.assertNotIn("description", place)
+        self.assertIs(type(place["created_at"]), str)
+        self.assertTrue(result["str"].startswith(
+            "[Place] ({}) {{".format(place["id"])))
+        self.assertIn("'color': 'blue'", result["str"])
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Contains the TestLRUCacheDocs and TestLRUCache classes
+"""
+
+import inspect
+from models.engine import cache
+import pep8
+import unittest
+LRUCache = cache.LRUCache
+
+
+class TestLRUCacheDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the cache module"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.cache_f = inspect.getmembers(LRUCache, inspect.isfunction)
+
+    def test_pep8_conformance_cache(self):
+        """Test that models/engine/cache.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/cache.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_cache.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_cache_module_docstring(self):
+        """Test for the cache.py module docstring"""
+        self.assertIsNot(cache.__doc__, None,
+                         "cache.py needs a docstring")
+        self.assertTrue(len(cache.__doc__) >= 1,
+                        "cache.py needs a docstring")
+
+    def test_cache_func_docstrings(self):
+        """Test for the presence of docstrings in LRUCache methods"""
+        for func in self.cache_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the LRUCache class"""
+    def test_hits_and_misses(self):
+        """Test that get counts hits and misses"""
+        lru = LRUCache(2)
+        self.assertIs(lru.get(("State", "row", "1")), None)
+        lru.put(("State", "row", "1"), {"id": "1"}, 0)
+        lru.put(("State", "count"), 0, 0)
+        self.assertEqual(lru.get(("State", "row", "1")), {"id": "1"})
+        self.assertEqual(lru.get(("State", "count")), 0)
+        self.assertEqual(lru.stats(), {"size": 2, "entries": 2, "hits": 2,
+                                       "misses": 1, "evictions": 0})
+
+    def test_eviction(self):
+        """Test that the least recently used entries are evicted"""
+        lru = LRUCache(2)
+        lru.put(("State", "row", "1"), 1, 0)
+        lru.put(("State", "row", "2"), 2, 0)
+        lru.get(("State", "row", "1"))
+        lru.put(("State", "row", "3"), 3, 0)
+        self.assertEqual(len(lru), 2)
+        self.assertIs(lru.get(("State", "row", "2")), None)
+        self.assertEqual(lru.get(("State", "row", "1")), 1)
+        self.assertEqual(lru.stats()["evictions"], 1)
+
+    def test_invalidate(self):
+        """Test that invalidate drops entries and refuses stale values"""
+        lru = LRUCache(10)
+        generation = lru.generation("State")
+        lru.put(("State", "row", "1"), 1, generation)
+        lru.put(("State", "row", "2"), 2, generation)
+        lru.put(("City", "row", "1"), 1, lru.generation("City"))
+        lru.invalidate("State", [("State", "row", "1")])
+        self.assertIs(lru.get(("State", "row", "1")), None)
+        self.assertEqual(lru.get(("State", "row", "2")), 2)
+        lru.put(("State", "row", "1"), 1, generation)
+        self.assertIs(lru.get(("State", "row", "1")), None)
+        lru.invalidate("State")
+        self.assertIs(lru.get(("State", "row", "2")), None)
+        self.assertEqual(lru.get(("City", "row", "1")), 1)
+        lru.put(("State", "row", "1"), 1, lru.generation("State"))
+        self.assertEqual(lru.get(("State", "row", "1")), 1)
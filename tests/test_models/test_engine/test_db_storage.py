@@ -3,6 +3,7 @@
 Contains the TestDBStorageDocs and TestDBStorage classes
 """
 
+from contextlib import contextmanager
 from datetime import datetime
 import inspect
 import models
@@ -17,12 +18,32 @@ from models.user import User
 import json
 from os import getenv
 import pep8
+from sqlalchemy import create_engine, event, text
 import unittest
+from unittest import mock
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
 
 
+@contextmanager
+def captured_statements(engine=None):
+    """yields the list of the statements sent to engine, the engine of
+    models.storage by default, until the block ends"""
+    if engine is None:
+        engine = models.storage._DBStorage__engine
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        """records each statement sent to the database"""
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
 class TestDBStorageDocs(unittest.TestCase):
     """Tests to check the documentation and style of DBStorage class"""
     @classmethod
@@ -70,13 +91,13 @@ test_db_storage.py'])
 
 class TestDBStorage(unittest.TestCase):
     """Test the DBStorage class"""
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db',
+    @unittest.skipIf(models.storage_t != 'db',
                      "not testing db storage")
     def test_all_returns_dict(self):
         """Test that all returns a dictionaty"""
         self.assertIs(type(models.storage.all()), dict)
 
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db',
+    @unittest.skipIf(models.storage_t != 'db',
                      "not testing db storage")
     def test_get(self):
         """Tests to check get method"""
@@ -87,8 +108,9 @@ class TestDBStorage(unittest.TestCase):
         self.assertIs(new_user, models.storage.get(User, new_user.id))
         self.assertIs(new_state, models.storage.get(State, new_state.id))
         self.assertIs(None, models.storage.get(State, 'Antioquia'))
+        self.assertIs(None, models.storage.get(BaseModel, 'Antioquia'))
 
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db',
+    @unittest.skipIf(models.storage_t != 'db',
                      "not testing db storage")
     def test_count(self):
         """Tests to check count method"""
@@ -100,3 +122,310 @@ class TestDBStorage(unittest.TestCase):
         new_state.save()
         new_states = models.storage.count(State)
         self.assertTrue(all_states < new_states)
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_get_queries(self):
+        """Test that get only queries objects missing from the session"""
+        new_state = State(name="Narino")
+        new_state.save()
+        with captured_statements() as statements:
+            self.assertIs(models.storage.get(State, None), None)
+            self.assertIs(models.storage.get(State, new_state.id), new_state)
+            self.assertEqual(statements, [])
+            self.assertIs(models.storage.get(State, 'Nowhere'), None)
+            self.assertEqual(len(statements), 1)
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_get_many(self):
+        """Test that get_many resolves a list of ids in one query"""
+        first = State(name="Huila")
+        second = State(name="Meta")
+        first.save()
+        second.save()
+        ids = [second.id, "Nowhere", None, first.id, second.id]
+        with captured_statements() as statements:
+            self.assertEqual(models.storage.get_many(State, ids),
+                             [second, first])
+            self.assertEqual(len(statements), 1)
+            self.assertIn(" IN ", statements[0])
+            self.assertEqual(models.storage.get_many("State", []), [])
+            self.assertEqual(models.storage.get_many(BaseModel, ids), [])
+            self.assertEqual(len(statements), 1)
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_counts(self):
+        """Test that counts gets the count of several classes in one query"""
+        State(name="Cesar").save()
+        with captured_statements() as statements:
+            counts = models.storage.counts([State, "City", BaseModel])
+        self.assertEqual(len(statements), 1)
+        self.assertIn("count", statements[0].lower())
+        self.assertEqual(counts["State"], models.storage.count(State))
+        self.assertEqual(counts["City"], models.storage.count("City"))
+        self.assertEqual(counts["BaseModel"], 0)
+        self.assertEqual(sum(models.storage.counts().values()),
+                         models.storage.count())
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_iterate(self):
+        """Test that iterate pages through ordered objects"""
+        amenities = [Amenity(name=name) for name in ["b", "a", "c"]]
+        for amenity in amenities:
+            amenity.save()
+        all_amenities = list(models.storage.iterate(Amenity))
+        self.assertEqual([amenity.id for amenity in all_amenities],
+                         sorted(amenity.id for amenity in all_amenities))
+        self.assertEqual(list(models.storage.iterate(Amenity, page_size=1)),
+                         all_amenities)
+        by_name = list(models.storage.iterate("Amenity", order_by="-name"))
+        self.assertEqual([amenity.name for amenity in by_name],
+                         sorted((amenity.name for amenity in by_name),
+                                reverse=True))
+        self.assertEqual(list(models.storage.iterate(Amenity, offset=1,
+                                                     limit=1)),
+                         all_amenities[1:2])
+        count = models.storage.count(Amenity)
+        self.assertEqual(list(models.storage.iterate(offset=count - 1,
+                                                     limit=2))[0],
+                         all_amenities[-1])
+        self.assertEqual(len(list(models.storage.iterate())),
+                         models.storage.count())
+        self.assertEqual(list(models.storage.iterate(
+            Amenity, after=all_amenities[0].id)), all_amenities[1:])
+        self.assertEqual(list(models.storage.iterate(
+            Amenity, order_by="-id", after=all_amenities[1].id)),
+            all_amenities[:1])
+        with self.assertRaises(ValueError):
+            list(models.storage.iterate(Amenity, order_by="name",
+                                        after=all_amenities[0].id))
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_prefetch(self):
+        """Test that prefetch loads relationships with constant queries"""
+        def walk():
+            """counts the queries of walking states, cities and places"""
+            models.storage.close()
+            del statements[:]
+            states = models.storage.all(
+                State, prefetch=["cities.places.amenities"]).values()
+            for state in states:
+                for city in state.cities:
+                    for place in city.places:
+                        place.amenities
+            return len(statements)
+        user = User(email="prefetch@hbnb.io", password="pwd")
+        user.save()
+        with captured_statements() as statements:
+            for i in range(3):
+                state = State(name="State{}".format(i))
+                state.save()
+                city = City(name="City{}".format(i), state_id=state.id)
+                city.save()
+                place = Place(name="Place{}".format(i), city_id=city.id,
+                              user_id=user.id)
+                place.save()
+                if i == 0:
+                    queries = walk()
+            self.assertEqual(walk(), queries)
+            self.assertLessEqual(queries, 4)
+            models.storage.close()
+            del statements[:]
+            place = models.storage.get(Place, place.id,
+                                       prefetch=["user", "amenities"])
+            place.user
+            place.amenities
+            self.assertEqual(len(statements), 2)
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_bulk_save(self):
+        """Test that bulk_save inserts batches with executemany"""
+        state = State(name="Bulk")
+        cities = [City(name="City{}".format(i), state_id=state.id)
+                  for i in range(5)]
+        count = models.storage.count(City)
+        with captured_statements() as statements:
+            models.storage.bulk_save(cities + [state], batch_size=2)
+        self.assertEqual(len([statement for statement in statements
+                              if statement.startswith("INSERT")]), 4)
+        self.assertEqual(models.storage.count(City), count + 5)
+        self.assertIs(models.storage.get(City, cities[0].id), cities[0])
+        state.name = "Bulked"
+        models.storage.save()
+        models.storage.close()
+        self.assertEqual(models.storage.get(State, state.id).name, "Bulked")
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_bulk_save_rejects_and_rolls_back(self):
+        """Test that bulk_save raises on objects it cannot insert, before
+        writing anything, and rolls back the pending changes with a failed
+        INSERT"""
+        engine = models.storage._DBStorage__engine
+
+        def stored(obj):
+            """tells if the row of obj is committed"""
+            with engine.connect() as connection:
+                return connection.execute(text(
+                    "SELECT COUNT(*) FROM {} WHERE id = :id".format(
+                        obj.__tablename__)), {"id": obj.id}).scalar() == 1
+        saved = State(name="Saved")
+        saved.save()
+        pending = State(name="Pending")
+        models.storage.new(pending)
+        with self.assertRaises(ValueError):
+            models.storage.bulk_save([State(name="New"), saved])
+        with self.assertRaises(ValueError):
+            models.storage.bulk_save([BaseModel()])
+        self.assertFalse(stored(pending))
+        with self.assertRaises(Exception):
+            models.storage.bulk_save([State(name="Copy", id=saved.id)])
+        self.assertFalse(stored(pending))
+        ids = (pending.id, saved.id)
+        models.storage.close()
+        self.assertIs(models.storage.get(State, ids[0]), None)
+        self.assertEqual(models.storage.get(State, ids[1]).name, "Saved")
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_changed_fields(self):
+        """Test that objects track the columns changed since they were
+        last saved"""
+        state = State(name="Cesar")
+        self.assertIn("name", state.changed_fields())
+        state.save()
+        self.assertEqual(state.changed_fields(), set())
+        state.name = "Cesar"
+        self.assertEqual(state.changed_fields(), set())
+        state.name = "Sucre"
+        self.assertEqual(state.changed_fields(), {"name"})
+        state.save()
+        self.assertEqual(state.changed_fields(), set())
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_cache_keeps_counts_of_updates(self):
+        """Test that updating an object keeps the cached count of its class,
+        and that adding one drops it"""
+        engine = create_engine("sqlite://")
+        storage = DBStorage(engine=engine, cache_size=100)
+        storage.reload()
+
+        def counts(statements):
+            """returns the number of counts among statements"""
+            return len([statement for statement in statements
+                        if "count(" in statement])
+        state = State(name="Choco")
+        storage.new(state)
+        storage.save()
+        storage.close()
+        try:
+            with captured_statements(engine) as statements:
+                self.assertEqual(storage.count(State), 1)
+                state = storage.get(State, state.id)
+                state.name = "Choco"
+                storage.save()
+                state.name = "Quindio"
+                storage.save()
+                self.assertEqual(storage.count(State), 1)
+                self.assertEqual(counts(statements), 1)
+                storage.close()
+                self.assertEqual(storage.get(State, state.id).name,
+                                 "Quindio")
+                storage.new(State(name="Risaralda"))
+                storage.save()
+                self.assertEqual(storage.count(State), 2)
+                self.assertEqual(counts(statements), 2)
+        finally:
+            storage.close()
+            engine.dispose()
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test the connection pool settings and statistics"""
+    def test_pool_settings(self):
+        """Test that pool arguments are read from the environment"""
+        environ = {"HBNB_MYSQL_POOL_SIZE": "20",
+                   "HBNB_MYSQL_MAX_OVERFLOW": "5",
+                   "HBNB_MYSQL_POOL_TIMEOUT": "2.5",
+                   "HBNB_MYSQL_POOL_RECYCLE": "3600",
+                   "HBNB_MYSQL_PRE_PING": "True"}
+        with mock.patch.dict("os.environ", environ):
+            self.assertEqual(db_storage.pool_settings(),
+                             {"pool_size": 20, "max_overflow": 5,
+                              "pool_timeout": 2.5, "pool_recycle": 3600,
+                              "pool_pre_ping": True})
+        with mock.patch.dict("os.environ", {"HBNB_MYSQL_PRE_PING": "0"}):
+            self.assertEqual(db_storage.pool_settings()["pool_pre_ping"],
+                             False)
+
+    def test_pool_stats(self):
+        """Test that the pool counts checkouts and overflow"""
+        engine = create_engine("sqlite://", pool_size=1, max_overflow=1,
+                               poolclass=db_storage.MonitoredQueuePool)
+        pool = engine.pool
+        stats = pool.stats()
+        self.assertEqual(stats["checkouts"], 0)
+        self.assertEqual(stats["checked_out"], 0)
+        first = engine.connect()
+        second = engine.connect()
+        second.execute(text("SELECT 1"))
+        stats = pool.stats()
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["checked_out"], 2)
+        self.assertEqual(stats["overflow"], 1)
+        self.assertGreater(stats["checkouts_per_second"], 0)
+        self.assertGreaterEqual(stats["wait_time"], stats["max_wait"])
+        first.close()
+        second.close()
+        self.assertEqual(pool.stats()["checked_out"], 0)
+        engine.dispose()
+        self.assertIsInstance(engine.pool, db_storage.MonitoredQueuePool)
+
+    @unittest.skipIf(models.storage_t != 'db',
+                     "not testing db storage")
+    def test_storage_pool_stats(self):
+        """Test that the storage reports the statistics of its pool"""
+        models.storage.count(State)
+        stats = models.storage.pool_stats()
+        self.assertGreater(stats["checkouts"], 0)
+
+
+class TestReplicas(unittest.TestCase):
+    """Test the choice of a read replica"""
+    def setUp(self):
+        """Creates two replica engines"""
+        self.engines = [create_engine("sqlite://",
+                                      poolclass=db_storage.MonitoredQueuePool)
+                        for i in range(2)]
+
+    def tearDown(self):
+        """Disposes of the replica engines"""
+        for engine in self.engines:
+            engine.dispose()
+
+    def test_round_robin(self):
+        """Test that replicas are chosen in turn"""
+        replicas = db_storage.Replicas(self.engines)
+        self.assertEqual([replicas.choose() for i in range(4)],
+                         self.engines * 2)
+
+    def test_least_load(self):
+        """Test that the replica with fewer connections in use is chosen"""
+        replicas = db_storage.Replicas(self.engines, "least_load")
+        self.assertEqual([replicas.choose() for i in range(2)],
+                         self.engines)
+        connection = self.engines[0].connect()
+        self.assertEqual([replicas.choose() for i in range(2)],
+                         [self.engines[1]] * 2)
+        connection.close()
+
+    def test_unknown_policy(self):
+        """Test that an unknown policy is refused"""
+        with self.assertRaises(ValueError):
+            db_storage.Replicas(self.engines, "random")
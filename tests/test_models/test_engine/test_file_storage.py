@@ -7,6 +7,7 @@ from datetime import datetime
 import inspect
 import models
 from models.engine import file_storage
+from models.engine import snapshot
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -15,10 +16,17 @@ from models.review import Review
 from models.state import State
 from models.user import User
 import json
+import os
 from os import getenv
 import pep8
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
+Snapshot = snapshot.Snapshot
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
@@ -68,24 +76,66 @@ test_file_storage.py'])
                             "{:s} method needs a docstring".format(func[0]))
 
 
+def reset_storage(file_path=None):
+    """forgets every object of the storage and what it read from the files,
+    without writing anything, like a new process; the storage then uses
+    the file file_path if given"""
+    with FileStorage._FileStorage__lock:
+        if file_path is not None:
+            FileStorage._FileStorage__file_path = file_path
+        for name, value in [("objects", {}), ("raw", {}), ("snapshot", None),
+                            ("listed", set()), ("dropped", set()),
+                            ("fk_deferred", set()), ("class_index", {}),
+                            ("sorted", {}), ("fk_index", {}),
+                            ("pending", {}), ("deleted", set()),
+                            ("fragments", {}), ("serialized", 0),
+                            ("written", 0), ("file_stamp", None),
+                            ("journal_ino", None), ("journal_offset", 0),
+                            ("loaded", {})]:
+            setattr(FileStorage, "_FileStorage__" + name, value)
+
+
 class TestFileStorage(unittest.TestCase):
     """Test the FileStorage class"""
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db',
+    def use_file(self, name="file.json", **settings):
+        """empties the storage and points it to a new file name in a
+        temporary directory, with the FileStorage settings given, like
+        journal=True, until the test ends; returns the path of the file"""
+        storage = FileStorage()
+        saved = storage._FileStorage__file_path
+        patches = [mock.patch.object(FileStorage, "_FileStorage__" + key,
+                                     value)
+                   for key, value in settings.items()]
+        for patch in patches:
+            patch.start()
+
+        def restore():
+            """puts the settings back and reloads the former file"""
+            for patch in patches:
+                patch.stop()
+            reset_storage(saved)
+            storage.reload()
+        self.addCleanup(restore)
+        path = os.path.join(tempfile.mkdtemp(), name)
+        reset_storage(path)
+        return path
+
+    @unittest.skipIf(models.storage_t == 'db',
                      "not testing file storage")
     def test_all_returns_dict(self):
-        """Test that all returns the FileStorage.__objects attr"""
+        """Test that all returns a copy of the FileStorage.__objects attr"""
         storage = FileStorage()
         new_dict = storage.all()
         self.assertEqual(type(new_dict), dict)
-        self.assertIs(new_dict, storage._FileStorage__objects)
+        self.assertEqual(new_dict, storage._FileStorage__objects)
+        self.assertIsNot(new_dict, storage._FileStorage__objects)
 
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db',
+    @unittest.skipIf(models.storage_t == 'db',
                      "not testing file storage")
     def test_new(self):
         """test that new adds an object to the FileStorage.__objects attr"""
         storage = FileStorage()
-        save = FileStorage._FileStorage__objects
-        FileStorage._FileStorage__objects = {}
+        self.use_file()
         test_dict = {}
         for key, value in classes.items():
             with self.subTest(key=key, value=value):
@@ -94,9 +144,8 @@ class TestFileStorage(unittest.TestCase):
                 storage.new(instance)
                 test_dict[instance_key] = instance
                 self.assertEqual(test_dict, storage._FileStorage__objects)
-        FileStorage._FileStorage__objects = save
 
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db',
+    @unittest.skipIf(models.storage_t == 'db',
                      "not testing file storage")
     def test_save(self):
         """Test that save properly saves objects to file.json"""
@@ -106,18 +155,17 @@ class TestFileStorage(unittest.TestCase):
             instance = value()
             instance_key = instance.__class__.__name__ + "." + instance.id
             new_dict[instance_key] = instance
-        save = FileStorage._FileStorage__objects
-        FileStorage._FileStorage__objects = new_dict
+        path = self.use_file(binary=False, shard_dir=None)
+        storage.bulk_new(new_dict.values())
         storage.save()
-        FileStorage._FileStorage__objects = save
         for key, value in new_dict.items():
             new_dict[key] = value.to_dict()
         string = json.dumps(new_dict)
-        with open("file.json", "r") as f:
+        with open(path, "r") as f:
             js = f.read()
         self.assertEqual(json.loads(string), json.loads(js))
 
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db',
+    @unittest.skipIf(models.storage_t == 'db',
                      "not testing file storage")
     def test_get(self):
         """Tests to check get method"""
@@ -131,8 +179,26 @@ class TestFileStorage(unittest.TestCase):
         new_state.save()
         self.assertIs(storage.get(State, new_state.id), new_state)
         self.assertIs(storage.get(State, 'NoExist'), None)
+        self.assertIs(storage.get(State, None), None)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_get_many(self):
+        """Tests to check get_many method"""
+        storage = FileStorage()
+        first = State(name="Valle")
+        second = State(name="Choco")
+        storage.new(first)
+        storage.new(second)
+        ids = [second.id, "NoExist", None, first.id, second.id]
+        self.assertEqual(storage.get_many(State, ids), [second, first])
+        self.assertEqual(storage.get_many(State, ids, prefetch=["cities"]),
+                         [second, first])
+        self.assertEqual(storage.get_many("State", []), [])
+        storage.delete(first)
+        storage.delete(second)
 
-    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db',
+    @unittest.skipIf(models.storage_t == 'db',
                      "not testing file storage")
     def test_count(self):
         """Tests to check count method"""
@@ -145,3 +211,553 @@ class TestFileStorage(unittest.TestCase):
         new_city = City(name='Cali')
         new_city.save()
         self.assertTrue(all_objects < storage.count())
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_counts(self):
+        """Tests to check counts method"""
+        storage = FileStorage()
+        counts = storage.counts([State, "City"])
+        self.assertEqual(counts, {"State": storage.count(State),
+                                  "City": storage.count(City)})
+        self.assertEqual(sum(storage.counts().values()), storage.count())
+        new_state = State(name="Caldas")
+        storage.new(new_state)
+        self.assertEqual(storage.counts([State])["State"],
+                         counts["State"] + 1)
+        storage.delete(new_state)
+        self.assertEqual(storage.counts([State]), {"State": counts["State"]})
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_iterate(self):
+        """Tests to check iterate method"""
+        storage = FileStorage()
+        self.use_file()
+        states = [State(id="s{}".format(i), name=name)
+                  for i, name in enumerate(["b", "a", "c", "a"])]
+        for state in reversed(states):
+            storage.new(state)
+        city = City(id="c0", name="z")
+        storage.new(city)
+        self.assertEqual(list(storage.iterate(State)), states)
+        self.assertEqual(list(storage.iterate("State", order_by="-id")),
+                         states[::-1])
+        self.assertEqual(list(storage.iterate(State, order_by="name")),
+                         [states[1], states[3], states[0], states[2]])
+        self.assertEqual(list(storage.iterate(State, order_by="-name")),
+                         [states[2], states[0], states[3], states[1]])
+        self.assertEqual(list(storage.iterate(State, offset=1, limit=2)),
+                         states[1:3])
+        self.assertEqual(list(storage.iterate(offset=3, limit=2)),
+                         [states[2], states[3]])
+        self.assertEqual(list(storage.iterate()), [city] + states)
+        storage.delete(states[0])
+        self.assertEqual(list(storage.iterate(State)), states[1:])
+        self.assertEqual(list(storage.iterate(State, limit=0)), [])
+        self.assertEqual(list(storage.iterate(State, after="s1")),
+                         states[2:])
+        self.assertEqual(list(storage.iterate(State, after="s10",
+                                              limit=1)), [states[2]])
+        self.assertEqual(list(storage.iterate(State, order_by="-id",
+                                              after="s3")),
+                         [states[2], states[1]])
+        with self.assertRaises(ValueError):
+            list(storage.iterate(after="s1"))
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_iterate_partially_loaded(self):
+        """Test that objects are ordered the same whether they are loaded
+        or still raw records"""
+        storage = FileStorage()
+        path = self.use_file(binary=False, shard_dir=None)
+        states = [State(name=name) for name in ["Cordoba", "Arauca", "Meta"]]
+        places = [Place(name=str(i), latitude=i) for i in [-10.0, 0.0, 5.0]]
+        records = {obj.__class__.__name__ + "." + obj.id: obj.to_dict()
+                   for obj in states + places}
+        del records["Place." + places[1].id]["latitude"]
+        with open(path, "w") as f:
+            json.dump(records, f)
+        storage.reload()
+        storage.get(State, states[1].id)
+        self.assertEqual([s.id for s in storage.iterate(
+            State, order_by="created_at")], [s.id for s in states])
+        storage.get(Place, places[2].id)
+        self.assertEqual([p.id for p in storage.iterate(
+            Place, order_by="latitude")], [p.id for p in places])
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_bulk_save(self):
+        """Test that bulk_save adds objects and writes them once"""
+        storage = FileStorage()
+        path = self.use_file(binary=False, shard_dir=None)
+        states = [State(name="State{}".format(i)) for i in range(50)]
+        with mock.patch.object(FileStorage, "_FileStorage__save",
+                               autospec=True) as save:
+            storage.bulk_save(states)
+        self.assertEqual(save.call_count, 1)
+        for state in states:
+            self.assertIs(storage.get(State, state.id), state)
+        storage.save()
+        with open(path, "r") as f:
+            on_disk = json.load(f)
+        for state in states:
+            self.assertIn("State." + state.id, on_disk)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_all_by_class(self):
+        """Test that all filters by a class or by a class name"""
+        storage = FileStorage()
+        new_state = State(name="Antioquia")
+        new_city = City(name="Medellin")
+        storage.new(new_state)
+        storage.new(new_city)
+        key = "State." + new_state.id
+        self.assertIs(storage.all(State)[key], new_state)
+        self.assertIs(storage.all("State")[key], new_state)
+        self.assertNotIn("City." + new_city.id, storage.all(State))
+        for obj in storage.all(City).values():
+            self.assertIs(type(obj), City)
+        storage.delete(new_state)
+        storage.delete(new_city)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_delete_updates_class_index(self):
+        """Test that get, all and count forget a deleted object"""
+        storage = FileStorage()
+        new_state = State(name="Boyaca")
+        storage.new(new_state)
+        states = storage.count(State)
+        self.assertIs(storage.get("State", new_state.id), new_state)
+        storage.delete(new_state)
+        self.assertEqual(storage.count(State), states - 1)
+        self.assertEqual(storage.count("State"), states - 1)
+        self.assertIs(storage.get(State, new_state.id), None)
+        self.assertNotIn("State." + new_state.id, storage.all(State))
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_related(self):
+        """Test that related follows foreign keys, even after they change"""
+        storage = FileStorage()
+        state = State(name="Narino")
+        other_state = State(name="Cauca")
+        city = City(name="Pasto", state_id=state.id)
+        for obj in [state, other_state, city]:
+            storage.new(obj)
+        self.assertEqual(storage.related(City, "state_id", state.id), [city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other_state.id
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other_state.cities, [city])
+        storage.delete(city)
+        self.assertEqual(other_state.cities, [])
+        storage.delete(state)
+        storage.delete(other_state)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_related_places_and_reviews(self):
+        """Test the City, User and Place relationships in file storage"""
+        storage = FileStorage()
+        user = User(email="a@b.co", password="pwd")
+        city = City(name="Cartagena")
+        place = Place(city_id=city.id, user_id=user.id, name="Casa")
+        review = Review(place_id=place.id, user_id=user.id, text="Nice")
+        for obj in [user, city, place, review]:
+            storage.new(obj)
+        self.assertEqual(city.places, [place])
+        self.assertEqual(user.places, [place])
+        self.assertEqual(user.reviews, [review])
+        self.assertEqual(place.reviews, [review])
+        for obj in [user, city, place, review]:
+            storage.delete(obj)
+        self.assertEqual(city.places, [])
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_journal(self):
+        """Test that journaled saves append changes and reload replays them"""
+        storage = FileStorage()
+        path = self.use_file(journal=True, journal_limit=2 ** 20)
+        storage.save()
+        self.assertFalse(os.path.exists(path + ".log"))
+        state = State(name="Meta")
+        city = City(name="Villavicencio", state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        state.name = "Guaviare"
+        storage.delete(city)
+        storage.save()
+        with open(path, "r") as f:
+            self.assertEqual(json.load(f), {})
+        with open(path + ".log", "r") as f:
+            self.assertEqual(len(f.readlines()), 4)
+        reset_storage()
+        storage.reload()
+        self.assertEqual(storage.get(State, state.id).name, "Guaviare")
+        self.assertIs(storage.get(City, city.id), None)
+        FileStorage._FileStorage__journal_limit = 0
+        storage.save()
+        self.assertFalse(os.path.exists(path + ".log"))
+        with open(path, "r") as f:
+            self.assertEqual(list(json.load(f)), ["State." + state.id])
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_close(self):
+        """Test that close only reloads what another process changed"""
+        storage = FileStorage()
+        path = self.use_file(journal=True)
+        state = State(name="Huila")
+        storage.new(state)
+        storage.save()
+        storage.close()
+        self.assertIs(storage.get(State, state.id), state)
+        amenity = Amenity(name="Wifi")
+        with open(path + ".log", "a") as f:
+            f.write(json.dumps([amenity.__class__.__name__ + "." +
+                                amenity.id, amenity.to_dict()]) + "\n")
+        storage.close()
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertEqual(storage.get(Amenity, amenity.id).name, "Wifi")
+        with open(path, "w") as f:
+            json.dump({}, f)
+        os.remove(path + ".log")
+        storage.close()
+        self.assertIs(storage.get(State, state.id), None)
+        self.assertIs(storage.get(Amenity, amenity.id), None)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_compaction_keeps_other_processes_records(self):
+        """Test that compacting the journal writes the records another
+        process appended to it"""
+        storage = FileStorage()
+        path = self.use_file(
+            os.path.basename(storage._FileStorage__file_path), journal=True,
+            journal_limit=2 ** 20, shard_dir=None)
+        storage.new(State(name="First"))
+        storage.save()
+        env = dict(os.environ, HBNB_FILE_JOURNAL="1", PYTHONPATH=os.getcwd())
+        env.pop("HBNB_FILE_SHARDS", None)
+        other = subprocess.run(
+            [sys.executable, "-c", "from models.state import State; "
+             "state = State(name='B'); state.save(); print(state.id)"],
+            cwd=os.path.dirname(path), stdout=subprocess.PIPE, check=True,
+            env=env)
+        other_id = other.stdout.decode().strip()
+        FileStorage._FileStorage__journal_limit = 0
+        state = State(name="A")
+        storage.new(state)
+        storage.save()
+        self.assertFalse(os.path.exists(path + ".log"))
+        reset_storage()
+        storage.reload()
+        self.assertEqual(storage.get(State, state.id).name, "A")
+        self.assertEqual(storage.get(State, other_id).name, "B")
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_unsaved_changes_survive_other_processes(self):
+        """Test that records another process saved do not replace objects
+        changed here and not saved yet, with and without the journal"""
+        storage = FileStorage()
+        for journal in [True, False]:
+            with self.subTest(journal=journal):
+                path = self.use_file(journal=journal)
+                state = State(name="Tolima")
+                storage.new(state)
+                storage.save()
+                storage.close()
+                state.name = "Local"
+                remote = dict(state.to_dict(), name="Remote")
+                if journal:
+                    with open(path + ".log", "a") as f:
+                        f.write(json.dumps(["State." + state.id, remote]) +
+                                "\n")
+                else:
+                    with open(path, "w") as f:
+                        json.dump({"State." + state.id: remote}, f)
+                storage.close()
+                self.assertIs(storage.get(State, state.id), state)
+                storage.save()
+                reset_storage()
+                storage.reload()
+                self.assertEqual(storage.get(State, state.id).name, "Local")
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_reload_is_lazy(self):
+        """Test that reload only instantiates the objects that are used"""
+        storage = FileStorage()
+        path = self.use_file()
+        state = State(name="Sucre")
+        city = City(name="Sincelejo", state_id=state.id)
+        amenity = Amenity(name="Pool")
+        with open(path, "w") as f:
+            json.dump({"State." + state.id: state.to_dict(),
+                       "City." + city.id: city.to_dict(),
+                       "Amenity." + amenity.id: amenity.to_dict()}, f)
+        storage.reload()
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(Amenity), 1)
+        loaded = storage.get(State, state.id)
+        self.assertEqual(loaded.name, "Sucre")
+        self.assertEqual(len(storage._FileStorage__objects), 1)
+        self.assertEqual([c.name for c in loaded.cities], ["Sincelejo"])
+        self.assertEqual(len(storage._FileStorage__raw), 1)
+        storage.save()
+        with open(path, "r") as f:
+            self.assertEqual(json.load(f)["Amenity." + amenity.id],
+                             amenity.to_dict())
+        self.assertEqual(len(storage.all()), 3)
+        self.assertEqual(len(storage._FileStorage__raw), 0)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_load_batches(self):
+        """Test that all() instantiates the records in batches, each object
+        like its class constructor would"""
+        storage = FileStorage()
+        path = self.use_file()
+        states = [State(name="State {}".format(i)) for i in range(5)]
+        user = User(email="bob@hbtn.io", password="pwd")
+        records = {"State." + state.id: state.to_dict() for state in states}
+        records["User." + user.id] = user.to_dict()
+        with open(path, "w") as f:
+            json.dump(records, f)
+        with mock.patch.object(FileStorage, "load_batch", 2):
+            storage.reload()
+            objs = storage.all()
+        self.assertEqual(len(storage._FileStorage__raw), 0)
+        self.assertEqual(len(objs), 6)
+        for key, value in records.items():
+            self.assertEqual(objs[key].to_dict(),
+                             type(objs[key])(**value).to_dict())
+        loaded = objs["State." + states[0].id]
+        self.assertIs(type(loaded), State)
+        self.assertEqual(loaded.created_at, states[0].created_at)
+        self.assertEqual(loaded.name, "State 0")
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_shards(self):
+        """Test the one file per class layout"""
+        storage = FileStorage()
+        tmp_dir = tempfile.mkdtemp()
+        shard_dir = os.path.join(tmp_dir, "shards")
+        path = self.use_file(shard_dir=shard_dir)
+        state = State(name="Tolima")
+        city = City(name="Ibague", state_id=state.id)
+        with open(path, "w") as f:
+            json.dump({"State." + state.id: state.to_dict(),
+                       "City." + city.id: city.to_dict()}, f)
+        storage.reload()
+        self.assertEqual(sorted(os.listdir(shard_dir)),
+                         sorted(file_storage.shard_files.values()))
+        reset_storage()
+        storage.reload()
+        self.assertEqual(storage._FileStorage__loaded, {})
+        self.assertEqual(storage.get(State, state.id).name, "Tolima")
+        self.assertEqual(list(storage._FileStorage__loaded), ["State"])
+        cities_stat = os.stat(os.path.join(shard_dir, "cities.json"))
+        Amenity(name="Sauna").save()
+        self.assertEqual(os.stat(os.path.join(shard_dir, "cities.json")),
+                         cities_stat)
+        with open(os.path.join(shard_dir, "amenities.json")) as f:
+            self.assertEqual(len(json.load(f)), 1)
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(len(storage._FileStorage__loaded), 7)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_binary_snapshot(self):
+        """Test saving and lazily reloading the binary snapshot format"""
+        storage = FileStorage()
+        path = self.use_file("file.hbnb", binary=True)
+        state = State(name="Choco")
+        city = City(name="Quibdo", state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        self.assertEqual(len(Snapshot(path)), 2)
+        reset_storage()
+        storage.reload()
+        self.assertEqual(storage.count(City), 1)
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+        loaded = storage.get(State, state.id)
+        self.assertEqual(loaded.name, "Choco")
+        self.assertEqual([c.name for c in loaded.cities], ["Quibdo"])
+        loaded.name = "Narino"
+        storage.save()
+        self.assertEqual(Snapshot(path).get("State." + state.id)["name"],
+                         "Narino")
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_binary_snapshot_index(self):
+        """Test that a reloaded snapshot is only read through its index
+        until a class is listed"""
+        storage = FileStorage()
+        path = self.use_file("file.hbnb", binary=True, journal=False,
+                             shard_dir=None)
+        states = [State(name=name) for name in ["Cauca", "Huila", "Meta"]]
+        storage.bulk_save(states)
+        reset_storage()
+        storage.reload()
+        self.assertEqual(storage.count(State), 3)
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage._FileStorage__raw, {})
+        self.assertEqual(storage.get(State, states[0].id).name, "Cauca")
+        self.assertIs(storage.get(State, "NoExist"), None)
+        storage.new(State(name="Vaupes"))
+        storage.delete(State(id=states[1].id))
+        self.assertEqual(storage.count(State), 3)
+        self.assertEqual(len(storage._FileStorage__class_index["State"]), 2)
+        self.assertEqual(sorted(s.name for s in storage.all(State).values()),
+                         ["Cauca", "Meta", "Vaupes"])
+        self.assertEqual(storage.count(State), 3)
+        storage.save()
+        self.assertEqual(Snapshot(path).count("State"), 3)
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_save_serializes_changed_objects(self):
+        """Test that save only serializes the objects that changed"""
+        storage = FileStorage()
+        path = self.use_file()
+        objs = [State(name="Arauca"), State(name="Vichada"),
+                Amenity(name="TV")]
+        for obj in objs:
+            storage.new(obj)
+        storage.save()
+        self.assertEqual(storage.save_stats(),
+                         {"written": 3, "serialized": 3})
+        storage.save()
+        self.assertEqual(storage.save_stats(),
+                         {"written": 3, "serialized": 0})
+        objs[0].name = "Casanare"
+        storage.save()
+        self.assertEqual(storage.save_stats(),
+                         {"written": 3, "serialized": 1})
+        with open(path, "r") as f:
+            self.assertEqual(json.load(f), {
+                obj.__class__.__name__ + "." + obj.id: obj.to_dict()
+                for obj in objs})
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_changed_fields(self):
+        """Test that stored objects track the fields changed since the last
+        save"""
+        storage = FileStorage()
+        self.use_file()
+        state = State(name="Cauca")
+        self.assertEqual(storage.changed_fields(state), set())
+        storage.new(state)
+        self.assertEqual(state.changed_fields(),
+                         {"id", "created_at", "updated_at", "name"})
+        storage.save()
+        self.assertEqual(state.changed_fields(), set())
+        state.name = "Cauca"
+        self.assertEqual(state.changed_fields(), set())
+        state.name = "Nariño"
+        self.assertEqual(state.changed_fields(), {"name"})
+        state.save()
+        self.assertEqual(state.changed_fields(), set())
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_journal_deltas(self):
+        """Test that the journal only records the fields of an update, and
+        that reload merges them into the stored object"""
+        storage = FileStorage()
+        path = self.use_file(journal=True)
+        storage.save()
+        state = State(name="Boyaca")
+        city = City(name="Tunja", state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        city.name = "Sogamoso"
+        storage.save()
+        storage.save()
+        with open(path + ".log", "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2], ["City." + city.id, {
+            "name": "Sogamoso", "__class__": "City"}, "update"])
+        reset_storage()
+        storage.reload()
+        self.assertEqual(storage.get(City, city.id).to_dict(),
+                         city.to_dict())
+        self.assertEqual([c.id for c in storage.get(
+            State, state.id).cities], [city.id])
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "not testing file storage")
+    def test_threads(self):
+        """Test that reads stay consistent while other threads write, to
+        the JSON file and to the binary snapshot"""
+        storage = FileStorage()
+        errors = []
+
+        def write():
+            """creates, saves and deletes cities of state"""
+            try:
+                for i in range(50):
+                    city = City(name=str(i), state_id=state.id)
+                    storage.new(city)
+                    storage.save()
+                    storage.delete(city)
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            """lists states and cities while write runs"""
+            try:
+                for i in range(200):
+                    for key, obj in storage.all().items():
+                        obj.id
+                    storage.all(State)
+                    storage.all(City)
+                    storage.count(City)
+                    state.cities
+            except Exception as error:
+                errors.append(error)
+        interval = sys.getswitchinterval()
+        try:
+            for binary in [False, True]:
+                with self.subTest(binary=binary):
+                    path = self.use_file(binary=binary, shard_dir=None)
+                    state = State(name="Magdalena")
+                    storage.new(state)
+                    # switch threads often, for readers to run in the
+                    # middle of writes
+                    sys.setswitchinterval(1e-6)
+                    threads = [threading.Thread(target=write)
+                               for i in range(2)]
+                    threads += [threading.Thread(target=read)
+                                for i in range(4)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    sys.setswitchinterval(interval)
+                    self.assertEqual(errors, [])
+                    self.assertEqual(state.cities, [])
+                    if binary:
+                        self.assertIsNotNone(
+                            Snapshot(path).get("State." + state.id))
+                    else:
+                        with open(path, "r") as f:
+                            self.assertIn("State." + state.id, json.load(f))
+        finally:
+            sys.setswitchinterval(interval)
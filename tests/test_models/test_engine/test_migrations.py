@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""
+Contains the TestMigrationsDocs and TestMigrations classes
+"""
+
+import inspect
+import models
+from models.engine import migrations
+import pep8
+from sqlalchemy import create_engine, event, text
+import unittest
+from unittest import mock
+
+
+class TestMigrationsDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the migrations"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.migrations_f = inspect.getmembers(migrations, inspect.isfunction)
+
+    def test_pep8_conformance_migrations(self):
+        """Test that models/engine/migrations.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/migrations.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_migrations(self):
+        """Test tests/test_models/test_migrations.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_migrations.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_migrations_module_docstring(self):
+        """Test for the migrations.py module docstring"""
+        self.assertIsNot(migrations.__doc__, None,
+                         "migrations.py needs a docstring")
+        self.assertTrue(len(migrations.__doc__) >= 1,
+                        "migrations.py needs a docstring")
+
+    def test_migrations_func_docstrings(self):
+        """Test for the presence of docstrings in migrations functions"""
+        for func in self.migrations_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestMigrations(unittest.TestCase):
+    """Test the migrations on in-memory SQLite databases"""
+    def setUp(self):
+        """Set up an empty database"""
+        self.engine = create_engine("sqlite://")
+
+    def tearDown(self):
+        """Dispose of the database"""
+        self.engine.dispose()
+
+    def test_new_database(self):
+        """Test that a new database is migrated to the last version"""
+        self.assertEqual(migrations.schema_version(self.engine), 0)
+        last = migrations.migrations[-1][0]
+        self.assertEqual(migrations.migrate(self.engine),
+                         list(range(1, last + 1)))
+        self.assertEqual(migrations.schema_version(self.engine), last)
+        self.assertEqual(migrations.missing_indexes(self.engine), [])
+        self.assertEqual(migrations.migrate(self.engine), [])
+
+    def test_declared_indexes(self):
+        """Test that the foreign keys and lookup columns are indexed"""
+        migrations.migrate(self.engine)
+        with self.engine.connect() as connection:
+            indexes = {row[0] for row in connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        for name in ["ix_cities_state_id", "ix_places_city_id",
+                     "ix_places_user_id", "ix_reviews_place_id",
+                     "ix_reviews_user_id", "ix_place_amenity_amenity_id",
+                     "ix_users_email", "ix_states_name", "ix_cities_name",
+                     "ix_amenities_name", "ix_places_name"]:
+            self.assertIn(name, indexes)
+
+    def test_upgrade_in_place(self):
+        """Test that a database created without the indexes nor a schema
+        version gets them, keeping its rows"""
+        migrations.migrate(self.engine)
+        with self.engine.begin() as connection:
+            for table in migrations.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.drop(connection)
+            migrations.schema_migrations.drop(connection)
+            connection.execute(text(
+                "INSERT INTO states (id, name, created_at, updated_at) "
+                "VALUES ('1', 'Valle', '2017-09-28', '2017-09-28')"))
+        missing = {index.name
+                   for index in migrations.missing_indexes(self.engine)}
+        self.assertIn("ix_cities_state_id", missing)
+        self.assertEqual(migrations.schema_version(self.engine), 0)
+        self.assertIn(2, migrations.migrate(self.engine))
+        self.assertEqual(migrations.missing_indexes(self.engine), [])
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text(
+                "SELECT name FROM states")).scalar(), "Valle")
+
+    def test_concurrent_upgrade(self):
+        """Test that migrate succeeds when another process creates the
+        indexes between their check and their creation"""
+        migrations.migrate(self.engine, 1)
+        with self.engine.begin() as connection:
+            for table in migrations.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.drop(connection)
+        stale = migrations.missing_indexes(self.engine)
+        missing_indexes = migrations.missing_indexes
+        calls = []
+
+        def raced(bind):
+            """creates the indexes like another process would, after the
+            first check found them missing"""
+            calls.append(bind)
+            if len(calls) > 1:
+                return missing_indexes(bind)
+            for index in stale:
+                index.create(self.engine)
+            return stale
+        with mock.patch.object(migrations, "missing_indexes", raced):
+            self.assertEqual(migrations.migrate(self.engine), [2])
+        self.assertEqual(migrations.schema_version(self.engine), 2)
+        self.assertEqual(migrations.missing_indexes(self.engine), [])
+
+    def test_target(self):
+        """Test that migrate stops at the target version"""
+        self.assertEqual(migrations.migrate(self.engine, 1), [1])
+        self.assertEqual(migrations.schema_version(self.engine), 1)
+
+    def test_fast_path(self):
+        """Test that migrating a current database runs a single query"""
+        migrations.migrate(self.engine)
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+        self.assertEqual(migrations.migrate(self.engine), [])
+        self.assertEqual(len(statements), 1)
+        self.assertIn("schema_migrations", statements[0])
+
+    def test_reset(self):
+        """Test that reset empties a current database without dropping its
+        tables, and drops those of an outdated one"""
+        migrations.migrate(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO states (id, name, created_at, updated_at) "
+                "VALUES ('1', 'Valle', '2017-09-28', '2017-09-28')"))
+        migrations.reset(self.engine)
+        last = migrations.migrations[-1][0]
+        self.assertEqual(migrations.schema_version(self.engine), last)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text(
+                "SELECT COUNT(*) FROM states")).scalar(), 0)
+        with self.engine.begin() as connection:
+            connection.execute(text("DELETE FROM schema_migrations"))
+        migrations.reset(self.engine)
+        self.assertEqual(migrations.missing_indexes(self.engine), [])
+        self.assertEqual(migrations.schema_version(self.engine), 0)
+        self.assertEqual(migrations.migrate(self.engine),
+                         list(range(1, last + 1)))
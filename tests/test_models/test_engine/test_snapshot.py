@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""
+Contains the TestSnapshotDocs and TestSnapshot classes
+"""
+
+import inspect
+import json
+from models.engine import snapshot
+from models.state import State
+from models.city import City
+import os
+import pep8
+import tempfile
+import unittest
+Snapshot = snapshot.Snapshot
+
+
+class TestSnapshotDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the snapshot module"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.snapshot_f = inspect.getmembers(Snapshot, inspect.isfunction)
+
+    def test_pep8_conformance_snapshot(self):
+        """Test that models/engine/snapshot.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/snapshot.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_snapshot.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_snapshot_module_docstring(self):
+        """Test for the snapshot.py module docstring"""
+        self.assertIsNot(snapshot.__doc__, None,
+                         "snapshot.py needs a docstring")
+        self.assertTrue(len(snapshot.__doc__) >= 1,
+                        "snapshot.py needs a docstring")
+
+    def test_snapshot_func_docstrings(self):
+        """Test for the presence of docstrings in Snapshot methods"""
+        for func in self.snapshot_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test the binary snapshot format"""
+    def setUp(self):
+        """Writes a JSON file with two states and a city"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.tmp_dir, "file.json")
+        self.path = os.path.join(self.tmp_dir, "file.hbnb")
+        state = State(name="Quindio")
+        self.objects = {}
+        for obj in [state, State(name="Caldas"),
+                    City(name="Armenia", state_id=state.id)]:
+            self.objects[obj.__class__.__name__ + "." + obj.id] = \
+                obj.to_dict()
+        with open(self.json_path, "w") as f:
+            json.dump(self.objects, f)
+
+    def test_get_and_count(self):
+        """Test point lookups and counts on a converted snapshot"""
+        snapshot.json_to_snapshot(self.json_path, self.path)
+        snap = Snapshot(self.path)
+        self.assertEqual(len(snap), 3)
+        self.assertEqual(snap.count("State"), 2)
+        self.assertEqual(snap.count("City"), 1)
+        self.assertEqual(snap.count("Place"), 0)
+        for key, value in self.objects.items():
+            self.assertEqual(snap.get(key), value)
+        self.assertIs(snap.get("State.NoExist"), None)
+        self.assertEqual(sorted(key for key, offset in snap.entries()),
+                         sorted(self.objects))
+        self.assertEqual([key for key, offset in snap.entries("State")],
+                         sorted(key for key in self.objects
+                                if key.startswith("State.")))
+        self.assertEqual(list(snap.entries("Place")), [])
+        for key, offset in snap.entries():
+            self.assertEqual(snap.offset(key), offset)
+        self.assertIs(snap.offset("State.NoExist"), None)
+        snap.close()
+
+    def test_round_trip(self):
+        """Test that converting back to JSON gives the same objects"""
+        snapshot.json_to_snapshot(self.json_path, self.path)
+        snapshot.snapshot_to_json(self.path, self.json_path)
+        with open(self.json_path, "r") as f:
+            self.assertEqual(json.load(f), self.objects)
+
+    def test_not_a_snapshot(self):
+        """Test that a JSON file is not read as a snapshot"""
+        with self.assertRaises(ValueError):
+            Snapshot(self.json_path)
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+import inspect
+import models
+from models.engine import sqlite_storage
+from models.city import City
+from models.state import State
+from os import getenv
+import os
+import pep8
+from sqlalchemy import event
+import sqlite3
+import tempfile
+import unittest
+SQLiteStorage = sqlite_storage.SQLiteStorage
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.sqls_f = inspect.getmembers(SQLiteStorage, inspect.isfunction)
+
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_sqlite_storage(self):
+        """Test tests/test_models/test_sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_sqlite_storage_module_docstring(self):
+        """Test for the sqlite_storage.py module docstring"""
+        self.assertIsNot(sqlite_storage.__doc__, None,
+                         "sqlite_storage.py needs a docstring")
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1,
+                        "sqlite_storage.py needs a docstring")
+
+    def test_sqlite_storage_class_docstring(self):
+        """Test for the SQLiteStorage class docstring"""
+        self.assertIsNot(SQLiteStorage.__doc__, None,
+                         "SQLiteStorage class needs a docstring")
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1,
+                        "SQLiteStorage class needs a docstring")
+
+    def test_sqls_func_docstrings(self):
+        """Test for the presence of docstrings in SQLiteStorage methods"""
+        for func in self.sqls_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """Test the SQLiteStorage class"""
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                     "not testing sqlite storage")
+    def test_storage_type(self):
+        """Test that sqlite storage uses the SQLAlchemy models"""
+        self.assertEqual(models.storage_t, "db")
+        self.assertIsInstance(models.storage, SQLiteStorage)
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                     "not testing sqlite storage")
+    def test_contract(self):
+        """Test all, new, save, get, count and delete on a new database"""
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = SQLiteStorage(os.path.join(tmp, "test.db"))
+            storage.reload()
+            state = State(name="Valle")
+            storage.new(state)
+            city = City(name="Cali", state_id=state.id)
+            storage.new(city)
+            storage.save()
+            self.assertIs(storage.get(State, state.id), state)
+            self.assertEqual(storage.count(), 2)
+            self.assertEqual(storage.count(City), 1)
+            self.assertEqual(list(storage.all(City).values()), [city])
+            storage.delete(city)
+            storage.save()
+            self.assertEqual(storage.count(City), 0)
+            storage.close()
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                     "not testing sqlite storage")
+    def test_wal_and_indexes(self):
+        """Test that the database is in WAL mode with indexed foreign keys"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "test.db")
+            storage = SQLiteStorage(path)
+            storage.reload()
+            storage.close()
+            conn = sqlite3.connect(path)
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+            conn.close()
+            self.assertEqual(mode, "wal")
+            for name in ["ix_cities_state_id", "ix_places_city_id",
+                         "ix_places_user_id", "ix_reviews_place_id",
+                         "ix_reviews_user_id"]:
+                self.assertIn(name, indexes)
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                     "not testing sqlite storage")
+    def test_replicas(self):
+        """Test that reads go to the replica until the session writes"""
+        with tempfile.TemporaryDirectory() as tmp:
+            primary = os.path.join(tmp, "primary.db")
+            replica = os.path.join(tmp, "replica.db")
+            replica_storage = SQLiteStorage(replica, [])
+            replica_storage.reload()
+            states = [State(name="Replicated"), State(name="Lagging")]
+            for state in states:
+                replica_storage.new(state)
+            replica_storage.save()
+            replica_storage.close()
+            storage = SQLiteStorage(primary, [replica])
+            storage.reload()
+            self.assertIs(storage.get(State, states[0].id), None)
+            storage.close()
+            storage.use_replicas()
+            self.assertEqual(storage.get(State, states[0].id).name,
+                             "Replicated")
+            self.assertEqual(storage.count(State), 2)
+            storage.new(State(name="Written"))
+            storage.save()
+            self.assertIs(storage.get(State, states[1].id), None)
+            self.assertEqual(storage.count(State), 1)
+            storage.close()
+            self.assertEqual(storage.count(State), 1)
+            self.assertEqual(len(storage.pool_stats()["replicas"]), 1)
+            storage.close()
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                     "not testing sqlite storage")
+    def test_cache(self):
+        """Test that cached reads skip the database until a commit"""
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            """records each statement sent to the database"""
+            statements.append(statement)
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = SQLiteStorage(os.path.join(tmp, "test.db"), [], 100)
+            storage.reload()
+            state = State(name="Cached")
+            storage.new(state)
+            storage.new(City(name="Kept", state_id=state.id))
+            storage.save()
+            storage.close()
+            self.assertEqual(storage.count(State), 1)
+            storage.all(State, prefetch=["cities"])
+            storage.close()
+            engine = storage._DBStorage__engine
+            event.listen(engine, "before_cursor_execute", count_statement)
+            try:
+                states = storage.all(State, prefetch=["cities"])
+                cached = states["State." + state.id]
+                self.assertIsNot(cached, state)
+                self.assertEqual(cached.name, "Cached")
+                self.assertEqual([city.name for city in cached.cities],
+                                 ["Kept"])
+                self.assertIs(storage.get(State, state.id), cached)
+                self.assertEqual(list(storage.iterate(State)), [cached])
+                self.assertEqual(storage.count(State), 1)
+                self.assertEqual(statements, [])
+                cached.name = "Changed"
+                storage.save()
+                storage.close()
+                self.assertEqual(storage.get(State, state.id).name,
+                                 "Changed")
+                self.assertEqual(len(statements), 2)
+            finally:
+                event.remove(engine, "before_cursor_execute",
+                             count_statement)
+            stats = storage.cache_stats()
+            self.assertGreater(stats["hits"], 0)
+            self.assertGreater(stats["misses"], 0)
+            storage.close()
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                     "not testing sqlite storage")
+    def test_startup_stats(self):
+        """Test that only the first start of a database migrates it"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "test.db")
+            storage = SQLiteStorage(path)
+            storage.reload()
+            stats = storage.startup_stats()
+            self.assertEqual(stats["migrations_applied"], [1, 2])
+            self.assertGreater(stats["schema_seconds"], 0)
+            storage.close()
+            storage = SQLiteStorage(path)
+            storage.reload()
+            self.assertEqual(storage.startup_stats()["migrations_applied"],
+                             [])
+            storage.close()
@@ -12,12 +12,18 @@ app = Flask(__name__)
 @app.route('/hbnb_filters', strict_slashes=False)
 def filters():
     """display a HTML page like 6-index.html from static"""
-    states = storage.all("State").values()
+    states = storage.all("State", prefetch=["cities"]).values()
     amenities = storage.all("Amenity").values()
     return render_template('10-hbnb_filters.html', states=states,
                            amenities=amenities)
 
 
+@app.before_request
+def read_from_replicas():
+    """pages only read, from a database read replica if any"""
+    storage.use_replicas()
+
+
 @app.teardown_appcontext
 def teardown_db(exception):
     """closes the storage on teardown"""
@@ -16,6 +16,12 @@ def states_list():
     return render_template('7-states_list.html', states=states)
 
 
+@app.before_request
+def read_from_replicas():
+    """pages only read, from a database read replica if any"""
+    storage.use_replicas()
+
+
 @app.teardown_appcontext
 def teardown_db(exception):
     """closes the storage on teardown"""
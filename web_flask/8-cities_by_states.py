@@ -12,10 +12,16 @@ app = Flask(__name__)
 @app.route('/cities_by_states', strict_slashes=False)
 def cities_by_states():
     """display the states and cities listed in alphabetical order"""
-    states = storage.all("State").values()
+    states = storage.all("State", prefetch=["cities"]).values()
     return render_template('8-cities_by_states.html', states=states)
 
 
+@app.before_request
+def read_from_replicas():
+    """pages only read, from a database read replica if any"""
+    storage.use_replicas()
+
+
 @app.teardown_appcontext
 def teardown_db(exception):
     """closes the storage on teardown"""
@@ -19,6 +19,12 @@ def states(state_id=None):
     return render_template('9-states.html', states=states, state_id=state_id)
 
 
+@app.before_request
+def read_from_replicas():
+    """pages only read, from a database read replica if any"""
+    storage.use_replicas()
+
+
 @app.teardown_appcontext
 def teardown_db(exception):
     """closes the storage on teardown"""